@@ -1,25 +1,15 @@
 import streamlit as st
-import pandas as pd
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
-import os
 
-load_dotenv(dotenv_path="../transform/.env")
+import queries
 
-print("HOST:", os.getenv("MYSQL_HOST"))
-print("PORT:", os.getenv("MYSQL_PORT"))
-print("USER:", os.getenv("MYSQL_USER"))
-print("DATABASE:", os.getenv("MYSQL_DATABASE"))
-# Variáveis de ambiente
-host = os.getenv("MYSQL_HOST")
-port = int(os.getenv("MYSQL_PORT"))
-user = os.getenv("MYSQL_USER")
-password = os.getenv("MYSQL_PASSWORD")
-database = os.getenv("MYSQL_DATABASE")
+# Um único engine (pool de conexões) reaproveitado entre os reruns do Streamlit.
+# Os números vêm das tabelas de resumo (resumo_*) que o ETL atualiza a cada carga
+# e ficam em cache até a próxima carga (versao = data da última carga) ou até
+# CACHE_TTL segundos.
+engine = queries.get_engine()
+versao = queries.last_load(engine)
+kpis = queries.kpis(engine, versao)
 
-engine = create_engine(f'mysql+pymysql://{user}:{password}@{host}:{port}/{database}')
-
-df = pd.read_sql_query("SELECT * FROM produtos", engine)
 # cria titulos
 st.title('📊 Pesquisa de Mercado - Notebooks no Mercado Livre')
 # Cria um subtitulos
@@ -27,23 +17,23 @@ st.subheader('💡 KPIs principais')
 # Cria três colunas de largura igual na interface.As variáveis col1, col2 e col3 representam cada uma das colunas, permitindo adicionar conteúdo específico em cada uma delas.
 col1, col2, col3 = st.columns(3)
 # KPI 1: Número total de itens
-# O método shape retorna uma tupla com o número de linhas e colunas do DataFrame.[0] acessa primeiro elemento da tupla
-total_itens = df.shape[0]
+# soma das contagens por marca em resumo_marcas
+total_itens = kpis['total_itens']
 #  método metric é usado para exibir um valor numérico com um rótulo (label) em um painel interativo.
 # value=total_itens: Define o valor que será exibido. Nesse caso, é o número total de linhas do DataFrame (total_itens).
 col1.metric(label="🖥️ Total de Notebooks", value=total_itens)
 
 # KPI 2: Número de marcas únicas
-# Calcula o número de valores únicos na coluna 'brand' do DataFrame 'df'.
-unique_brands = df['brand'].nunique()
+# Número de valores únicos na coluna 'brand' (marcas com produtos em resumo_marcas).
+unique_brands = kpis['unique_brands']
 # Exibe o número de marcas únicas como uma métrica em uma das colunas da interface (col2).
 # 'label' define o texto que aparece acima do valor da métrica.
 # 'value' define o valor numérico a ser exibido.
 col2.metric(label="🏷️ Marcas Únicas", value=unique_brands)
 
 # KPI 3: Preço médio novo (em reais)
-# Calcula a média dos valores na coluna 'new_price' do DataFrame 'df'.
-average_new_price = df['new_price'].mean()
+# Média dos valores na coluna 'new_price' (soma dos preços / quantidade de preços em resumo_marcas).
+average_new_price = kpis['average_new_price'] or 0.0
 # Exibe o preço médio como uma métrica em outra coluna da interface (col3).
 # 'label' define o texto que aparece acima do valor da métrica.
 # 'value' define o valor a ser exibido, formatado para duas casas decimais e precedido por "R$".
@@ -55,8 +45,8 @@ col3.metric(label="💰 Preço Médio (R$)", value=f"{average_new_price:.2f}")
 st.subheader('🏆 Marcas mais encontradas até a 10ª página')
 # Cria duas colunas com proporções de largura 4:2 na interface.
 col1, col2 = st.columns([4, 2])
-# Conta a frequência de cada valor único na coluna 'brand' e ordena em ordem decrescente.
-top_brands = df['brand'].value_counts().sort_values(ascending=False)
+# Frequência de cada marca em ordem decrescente (lida pronta de resumo_marcas).
+top_brands = queries.brand_counts(engine, versao)
 # Exibe um gráfico de barras na primeira coluna (col1) mostrando a frequência das marcas.
 col1.bar_chart(top_brands)
 # Exibe os dados de frequência das marcas como texto na segunda coluna (col2).
@@ -67,10 +57,8 @@ col2.write(top_brands)
 st.subheader('💵 Preço médio por marca')
 # Cria duas colunas com proporções de largura 4:2 na interface.
 col1, col2 = st.columns([4, 2])
-# Cria um novo DataFrame contendo apenas as linhas onde o preço ('new_price') é maior que zero.
-df_non_zero_prices = df[df['new_price'] > 0]
-# Agrupa o DataFrame 'df_non_zero_prices' pela coluna 'brand', calcula a média da coluna 'new_price' para cada grupo e ordena em ordem decrescente.
-average_price_by_brand = df_non_zero_prices.groupby('brand')['new_price'].mean().sort_values(ascending=False)
+# Média de 'new_price' por marca, só com preços maiores que zero, em ordem decrescente (price_sum / price_count de resumo_marcas).
+average_price_by_brand = queries.average_price_by_brand(engine, versao)
 # Exibe um gráfico de barras na primeira coluna (col1) mostrando o preço médio por marca.
 col1.bar_chart(average_price_by_brand)
 # Exibe os dados do preço médio por marca como texto na segunda coluna (col2).
@@ -81,11 +69,25 @@ col2.write(average_price_by_brand)
 st.subheader('⭐ Satisfação média por marca')
 # Cria duas colunas com proporções de largura 4:2 na interface.
 col1, col2 = st.columns([4, 2])
-# Cria um novo DataFrame contendo apenas as linhas onde o número de avaliações ('reviews_rating_number') é maior que zero.
-df_non_zero_reviews = df[df['reviews_rating_number'] > 0]
-# Agrupa o DataFrame 'df_non_zero_reviews' pela coluna 'brand', calcula a média da coluna 'reviews_rating_number' para cada grupo e ordena em ordem decrescente.
-satisfaction_by_brand = df_non_zero_reviews.groupby('brand')['reviews_rating_number'].mean().sort_values(ascending=False)
+# Média de 'reviews_rating_number' por marca, só produtos com nota, em ordem decrescente (rating_sum / rating_count de resumo_marcas).
+satisfaction_by_brand = queries.satisfaction_by_brand(engine, versao)
 # Exibe um gráfico de barras na primeira coluna (col1) mostrando a satisfação média por marca.
 col1.bar_chart(satisfaction_by_brand)
 # Exibe os dados da satisfação média por marca como texto na segunda coluna (col2).
-col2.write(satisfaction_by_brand)
\ No newline at end of file
+col2.write(satisfaction_by_brand)
+
+# Distribuição de preços
+# Define um subtítulo para a seção do histograma de preços.
+st.subheader(f'📈 Produtos por faixa de preço (faixas de R$ {queries.PRICE_BUCKET})')
+# Quantidade de produtos em cada faixa de preço, lida da tabela de resumo resumo_precos.
+price_histogram = queries.price_histogram(engine, versao)
+# Exibe um gráfico de barras com a quantidade de produtos por faixa (índice = início da faixa).
+st.bar_chart(price_histogram)
+
+# Vendedores
+# Define um subtítulo para a seção de vendedores.
+st.subheader('🏪 Vendedores com mais produtos')
+# Quantidade de produtos, preço médio e nota média dos 10 maiores vendedores (tabela resumo_vendedores).
+top_sellers = queries.top_sellers(engine, versao)
+# Exibe a tabela com os vendedores.
+st.dataframe(top_sellers)
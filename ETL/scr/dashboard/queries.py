@@ -0,0 +1,118 @@
+import os
+import sys
+
+import pandas as pd
+import streamlit as st
+from sqlalchemy import case, func, select
+
+# o pacote do Scrapy (tabela produtos e engine) fica em ../mercadolivre
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'mercadolivre'))
+
+from mercadolivre import db  # noqa: E402
+from mercadolivre.db import PRICE_BUCKET, produtos, resumo_marcas, resumo_precos, resumo_vendedores  # noqa: E402
+
+# Tempo máximo (segundos) que um resultado fica em cache, mesmo sem carga nova
+CACHE_TTL = 600
+
+
+@st.cache_resource
+def get_engine():
+    """Um engine (com pool de conexões) para todas as sessões e reruns do app."""
+    return db.get_engine()
+
+
+def last_load(engine):
+    """
+    Data da última carga (MAX(scraped_at), resolvido pelo índice).
+
+    Vai como argumento das consultas abaixo: quando o ETL grava dados novos
+    a chave do cache muda e os números são recalculados na hora.
+    """
+    with engine.connect() as conn:
+        return conn.execute(select(func.max(produtos.c.scraped_at))).scalar()
+
+
+def _series(engine, query):
+    """Consulta de duas colunas (chave, valor) -> Series indexada pela chave."""
+    with engine.connect() as conn:
+        rows = conn.execute(query).all()
+    return pd.Series({key: value for key, value in rows}, dtype='float64')
+
+
+# As consultas abaixo leem as tabelas de resumo que o ETL mantém a cada carga
+# (db.resumo_*): o custo é O(número de marcas/vendedores), não O(produtos).
+@st.cache_data(ttl=CACHE_TTL)
+def kpis(_engine, version):
+    """Total de produtos, marcas distintas e preço médio, numa consulta só."""
+    known = (resumo_marcas.c.brand != '') & (resumo_marcas.c.products > 0)
+    query = select(
+        func.coalesce(func.sum(resumo_marcas.c.products), 0),
+        func.coalesce(func.sum(case((known, 1), else_=0)), 0),
+        func.sum(resumo_marcas.c.price_sum) / func.nullif(func.sum(resumo_marcas.c.price_count), 0),
+    )
+    with _engine.connect() as conn:
+        total, brands, avg_price = conn.execute(query).one()
+    return {'total_itens': total, 'unique_brands': brands, 'average_new_price': avg_price}
+
+
+def _by_key(table, key, value, where, limit=None):
+    """Consulta "chave -> valor" em uma tabela de resumo, do maior para o menor."""
+    value = value.label('value')
+    return (
+        select(table.c[key], value)
+        .where(table.c[key] != '', where)
+        .order_by(value.desc())
+        .limit(limit)
+    )
+
+
+@st.cache_data(ttl=CACHE_TTL)
+def brand_counts(_engine, version):
+    """Quantidade de produtos por marca, da mais frequente para a menos."""
+    r = resumo_marcas
+    return _series(_engine, _by_key(r, 'brand', r.c.products, r.c.products > 0)).astype('int64')
+
+
+@st.cache_data(ttl=CACHE_TTL)
+def average_price_by_brand(_engine, version):
+    """Preço médio por marca (só preços maiores que zero)."""
+    r = resumo_marcas
+    return _series(_engine, _by_key(r, 'brand', r.c.price_sum / r.c.price_count, r.c.price_count > 0))
+
+
+@st.cache_data(ttl=CACHE_TTL)
+def satisfaction_by_brand(_engine, version):
+    """Nota média por marca (só produtos com nota)."""
+    r = resumo_marcas
+    return _series(_engine, _by_key(r, 'brand', r.c.rating_sum / r.c.rating_count, r.c.rating_count > 0))
+
+
+@st.cache_data(ttl=CACHE_TTL)
+def price_histogram(_engine, version):
+    """Produtos por faixa de preço (índice = início da faixa de PRICE_BUCKET reais)."""
+    query = (
+        select(resumo_precos.c.bucket, resumo_precos.c.products)
+        .where(resumo_precos.c.products > 0)
+        .order_by(resumo_precos.c.bucket)
+    )
+    return _series(_engine, query).astype('int64')
+
+
+@st.cache_data(ttl=CACHE_TTL)
+def top_sellers(_engine, version, limit=10):
+    """Vendedores com mais produtos: quantidade, preço médio e nota média."""
+    r = resumo_vendedores
+    query = (
+        select(
+            r.c.seller,
+            r.c.products,
+            (r.c.price_sum / func.nullif(r.c.price_count, 0)).label('avg_price'),
+            (r.c.rating_sum / func.nullif(r.c.rating_count, 0)).label('avg_rating'),
+        )
+        .where(r.c.seller != '', r.c.products > 0)
+        .order_by(r.c.products.desc())
+        .limit(limit)
+    )
+    with _engine.connect() as conn:
+        rows = conn.execute(query).all()
+    return pd.DataFrame(rows, columns=['seller', 'products', 'avg_price', 'avg_rating']).set_index('seller')
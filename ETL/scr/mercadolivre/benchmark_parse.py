@@ -0,0 +1,209 @@
+import argparse
+import gzip
+import os
+import time
+
+from lxml import etree, html
+from parsel.csstranslator import css2xpath
+from scrapy.http import HtmlResponse
+
+from mercadolivre.spiders.notebook import NotebookSpider
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(HERE, 'fixtures')
+# Sem path e sem fixtures/ (a pasta não vai para o git) o benchmark usa páginas sintéticas
+SYNTHETIC_PAGES = 20
+# Páginas salvas (e o cache) do Mercado Livre são UTF-8; todas as estratégias decodificam igual
+ENCODING = 'utf-8'
+
+# Os mesmos seletores do NotebookSpider.parse
+CARD = 'div.ui-search-result__wrapper'
+FIELDS = {
+    'url': 'a.poly-component__title::attr(href)',
+    'brand': 'span.poly-component__brand::text',
+    'name': 'a.poly-component__title::text',
+    'seller': 'span.poly-component__seller::text',
+    'prices': 'span.andes-money-amount__fraction::text',
+    'reviews_rating_number': 'span.poly-reviews__rating::text',
+    'reviews_amount': 'span.poly-reviews__total::text',
+}
+
+
+#? Páginas de teste (sem rede)
+def load_pages(path):
+    """
+    Corpo das páginas salvas em `path`: arquivos .html (ou .html.gz) e também
+    os response_body do cache HTTP do Scrapy (.scrapy/httpcache/notebook).
+
+    Retorna:
+        lista de (nome, bytes)
+    """
+    pages = []
+    for root, _, files in os.walk(path):
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            if name.endswith(('.html', '.htm')) or name == 'response_body':
+                with open(full, 'rb') as f:
+                    body = f.read()
+            elif name.endswith('.html.gz'):
+                with gzip.open(full, 'rb') as f:
+                    body = f.read()
+            else:
+                continue
+            if body[:2] == b'\x1f\x8b':  # cache com HTTPCACHE_GZIP
+                body = gzip.decompress(body)
+            pages.append((os.path.relpath(full, path), body))
+    return pages
+
+
+def synthetic_page(cards=48):
+    """Página com a mesma estrutura da listagem, para rodar sem fixtures."""
+    card = (
+        '<li><div class="ui-search-result__wrapper"><div class="poly-card">'
+        '<span class="poly-component__brand">ASUS</span>'
+        '<a class="poly-component__title" href="https://produto.mercadolivre.com.br/MLB-{i}-notebook">'
+        'Notebook Asus Vivobook {i} Intel Core I5 8gb 512gb Ssd</a>'
+        '<span class="poly-component__seller">Por Loja {i} </span>'
+        '<span class="poly-reviews__rating">4.{d}</span><span class="poly-reviews__total">({i})</span>'
+        '<s><span class="andes-money-amount__fraction">3.{i:03d}</span></s>'
+        '<span class="andes-money-amount__fraction">2.{i:03d}</span>'
+        '<span class="andes-money-amount__fraction">{i}</span>'
+        '</div></div></li>'
+    )
+    body = ''.join(card.format(i=i, d=i % 10) for i in range(cards))
+    return f'<html><body><ol>{body}</ol></body></html>'.encode()
+
+
+#? Estratégias de extração (todas devolvem os mesmos dicts)
+def _item(values):
+    prices = values['prices']
+    return {
+        'url': values['url'],
+        'brand': values['brand'],
+        'name': values['name'],
+        'seller': values['seller'],
+        'old_price': prices[0] if len(prices) > 0 else None,
+        'new_price': prices[1] if len(prices) > 1 else None,
+        'reviews_rating_number': values['reviews_rating_number'],
+        'reviews_amount': values['reviews_amount'],
+    }
+
+
+def extract_spider(spider, response):
+    """O próprio NotebookSpider.parse (seletores CSS do parsel)."""
+    return [dict(item) for item in spider.parse(response)]
+
+
+_XPATH_CARD = css2xpath(CARD)
+_XPATH_FIELDS = {field: css2xpath(css) for field, css in FIELDS.items()}
+
+
+def extract_parsel_xpath(response):
+    """parsel com as XPaths já traduzidas (sem traduzir CSS a cada chamada)."""
+    items = []
+    for card in response.xpath(_XPATH_CARD):
+        values = {field: card.xpath(xpath) for field, xpath in _XPATH_FIELDS.items()}
+        values = {field: sel.getall() if field == 'prices' else sel.get() for field, sel in values.items()}
+        items.append(_item(values))
+    return items
+
+
+_LXML_CARD = etree.XPath(_XPATH_CARD)
+_LXML_FIELDS = {field: etree.XPath(xpath) for field, xpath in _XPATH_FIELDS.items()}
+# sem encoding explícito o lxml adivinha pelos bytes e erra em página sem <meta charset>
+_LXML_PARSER = html.HTMLParser(encoding=ENCODING)
+
+
+def extract_lxml(body):
+    """lxml puro com XPaths compiladas uma vez (sem os objetos Selector do parsel)."""
+    items = []
+    for card in _LXML_CARD(html.fromstring(body, parser=_LXML_PARSER)):
+        values = {}
+        for field, xpath in _LXML_FIELDS.items():
+            found = [str(v) for v in xpath(card)]
+            values[field] = found if field == 'prices' else (found[0] if found else None)
+        items.append(_item(values))
+    return items
+
+
+#? Benchmark
+def _timed(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark(pages, repeat=5):
+    """
+    Roda cada estratégia sobre todas as páginas (melhor de `repeat` rodadas).
+
+    Retorna:
+        dict com itens/s por estratégia e tempo total de cada seletor CSS
+    """
+    spider = NotebookSpider()
+    url = NotebookSpider.start_urls[0]
+    # o parse do HTML acontece uma vez por resposta (lazy), então cada rodada usa respostas novas
+    responses = lambda: [HtmlResponse(url, body=body, encoding=ENCODING) for _, body in pages]  # noqa: E731
+
+    strategies = {
+        'spider.parse (CSS)': lambda: [i for r in responses() for i in extract_spider(spider, r)],
+        'parsel XPath pré-traduzida': lambda: [i for r in responses() for i in extract_parsel_xpath(r)],
+        'lxml XPath compilada': lambda: [i for _, body in pages for i in extract_lxml(body)],
+    }
+
+    results, reference = {}, None
+    for name, function in strategies.items():
+        seconds, items = _timed(function, repeat)
+        if reference is None:
+            reference = items
+        elif items != reference:
+            raise AssertionError(f"{name} extraiu itens diferentes do spider.parse")
+        results[name] = {'items': len(items), 'seconds': seconds, 'items_per_second': len(items) / seconds}
+
+    # custo de cada seletor do spider (CSS traduzido a cada chamada, como no parse)
+    cards = [card for r in responses() for card in r.css(CARD)]
+    selectors = {}
+    for field, css in FIELDS.items():
+        getter = (lambda c, s=css: c.css(s).getall()) if field == 'prices' else (lambda c, s=css: c.css(s).get())
+        seconds, _ = _timed(lambda: [getter(card) for card in cards], repeat)
+        selectors[field] = {'css': css, 'seconds': seconds, 'us_per_card': seconds / max(len(cards), 1) * 1e6}
+
+    return {'pages': len(pages), 'cards': len(cards), 'strategies': results, 'selectors': selectors}
+
+
+def print_report(report):
+    print(f"{report['pages']} páginas, {report['cards']} produtos\n")
+
+    print(f"{'estratégia':<30} {'itens':>7} {'tempo (s)':>10} {'itens/s':>10}")
+    for name, r in report['strategies'].items():
+        print(f"{name:<30} {r['items']:>7} {r['seconds']:>10.4f} {r['items_per_second']:>10.0f}")
+
+    print(f"\n{'campo':<24} {'seletor':<45} {'µs/produto':>11}")
+    for field, r in sorted(report['selectors'].items(), key=lambda kv: -kv[1]['seconds']):
+        print(f"{field:<24} {r['css']:<45} {r['us_per_card']:>11.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark offline do parse do NotebookSpider")
+    parser.add_argument('path', nargs='?', default=None,
+                        help="pasta com páginas .html salvas ou o cache HTTP (.scrapy/httpcache/notebook); "
+                             "padrão: fixtures/ se tiver páginas, senão só as sintéticas")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--synthetic', type=int, default=None,
+                        help="acrescenta N páginas sintéticas de 48 produtos "
+                             f"(padrão: {SYNTHETIC_PAGES} se não há path nem páginas em fixtures/, senão 0)")
+    args = parser.parse_args()
+
+    path = args.path or FIXTURES_DIR
+    pages = load_pages(path) if os.path.isdir(path) else []
+    synthetic = args.synthetic
+    if synthetic is None:
+        synthetic = SYNTHETIC_PAGES if args.path is None and not pages else 0
+    pages += [(f"sintetica-{i}", synthetic_page()) for i in range(synthetic)]
+    if not pages:
+        parser.error(f"nenhuma página em {path} (use --synthetic N para testar sem fixtures)")
+
+    print_report(benchmark(pages, args.repeat))
@@ -0,0 +1,154 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from mercadolivre.spiders.notebook import NotebookSpider, price_range_url
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_PATH = os.path.join(HERE, 'data.jsonl')
+
+logger = logging.getLogger(__name__)
+
+
+def expand_categories(categories, price_ranges=None):
+    """
+    Lista final de listagens: cada categoria x cada faixa de preço.
+
+    - categories: URLs de listagem
+    - price_ranges: lista de (min, max) ou None (usa a URL como está)
+    """
+    if not price_ranges:
+        return list(categories)
+    return [price_range_url(url, low, high) for url in categories for low, high in price_ranges]
+
+
+def split(items, parts):
+    """Divide `items` em até `parts` grupos (round-robin), sem grupos vazios."""
+    groups = [items[i::parts] for i in range(parts)]
+    return [g for g in groups if g]
+
+
+def crawl_command(categories, max_pages, feed_path, dedup_db, load_db=False, replay=False, extra_settings=()):
+    """Linha de comando de um processo `scrapy crawl notebook` com a sua parte das categorias."""
+    pipelines = {
+        "mercadolivre.pipelines.NormalizationPipeline": 300,
+        "mercadolivre.pipelines.DedupPipeline": 350,
+    }
+    if load_db:
+        pipelines["mercadolivre.pipelines.MySQLPipeline"] = 400
+
+    command = [
+        sys.executable, '-m', 'scrapy', 'crawl', 'notebook',
+        '-a', f"categories={','.join(categories)}",
+        '-a', f"max_pages={max_pages}",
+        '-a', f"replay={int(replay)}",
+        '-s', f"DEDUP_DB={dedup_db}",
+        '-s', f"ITEM_PIPELINES={json.dumps(pipelines)}",
+        '-s', f"FEEDS={json.dumps({feed_path: {'format': 'jsonlines', 'encoding': 'utf8', 'overwrite': True}})}",
+    ]
+    for setting in extra_settings:
+        command += ['-s', setting]
+    return command
+
+
+def merge_feeds(parts, output_path):
+    """Acrescenta as partes (na ordem) ao fim do feed principal, linha a linha."""
+    total = 0
+    with open(output_path, 'ab') as out:
+        for part in parts:
+            if not os.path.exists(part):
+                continue
+            with open(part, 'rb') as f:
+                for line in f:
+                    out.write(line)
+                    total += 1
+    return total
+
+
+def run(
+    categories,
+    processes=4,
+    max_pages=30,
+    output_path=OUTPUT_PATH,
+    load_db=False,
+    replay=False,
+    extra_settings=()
+):
+    """
+    Roda o spider em vários processos, cada um com um grupo de categorias.
+
+    Todos os processos dividem o mesmo SQLite de product_id (DedupPipeline),
+    então um produto que aparece em mais de uma categoria/faixa entra uma vez
+    só. No fim as saídas são juntadas em `output_path` (JSON Lines, o mesmo
+    feed que o transform lê).
+
+    Retorna:
+        quantidade de produtos acrescentados ao feed
+    """
+    groups = split(list(categories), processes)
+    # partes, logs e o banco de fingerprints ficam na pasta temporária do sistema,
+    # fora do projeto; só o feed final é escrito aqui
+    workdir = tempfile.mkdtemp(prefix='crawl-')
+    dedup_db = os.path.join(workdir, 'fingerprints.sqlite')
+    parts = [os.path.join(workdir, f"part-{i}.jsonl") for i in range(len(groups))]
+
+    try:
+        running = []
+        for i, (group, part) in enumerate(zip(groups, parts)):
+            log = open(os.path.join(workdir, f"part-{i}.log"), 'w', encoding='utf-8')
+            command = crawl_command(group, max_pages, part, dedup_db, load_db, replay, extra_settings)
+            running.append((subprocess.Popen(command, cwd=HERE, stdout=log, stderr=subprocess.STDOUT), log))
+            logger.info("Processo %s: %s categorias", i, len(group))
+
+        failed = []
+        for i, (process, log) in enumerate(running):
+            if process.wait() != 0:
+                failed.append(i)
+            log.close()
+        if failed:
+            raise RuntimeError(f"Processos {failed} terminaram com erro (logs em {workdir})")
+
+        total = merge_feeds(parts, output_path)
+        logger.info("%s produtos únicos acrescentados em %s", total, output_path)
+    except BaseException:
+        logger.error("Crawl incompleto: partes e logs mantidos em %s", workdir)
+        raise
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    return total
+
+
+def _parse_price_ranges(text):
+    """"0-800,800-2500" -> [(0, 800), (800, 2500)]"""
+    if not text:
+        return None
+    return [tuple(int(v) for v in part.split('-')) for part in text.split(',')]
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    parser = argparse.ArgumentParser(description="Crawl de várias categorias em paralelo, sem produtos repetidos")
+    parser.add_argument('categories', nargs='*', help="URLs de listagem (padrão: a do NotebookSpider)")
+    parser.add_argument('--categories-file', help="arquivo com uma URL de listagem por linha")
+    parser.add_argument('--price-ranges', help='faixas de preço por categoria, ex: "0-800,800-2500,2500-6000"')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--max-pages', type=int, default=NotebookSpider.max_pages)
+    parser.add_argument('--output', default=OUTPUT_PATH, help="feed JSON Lines de saída (acrescenta no fim)")
+    parser.add_argument('--db', action='store_true', help="também grava no banco durante o crawl (MySQLPipeline)")
+    parser.add_argument('--replay', action='store_true', help="só páginas do cache HTTP, sem rede")
+    parser.add_argument('-s', dest='settings', action='append', default=[], help="setting extra do Scrapy (NOME=valor)")
+    args = parser.parse_args()
+
+    categories = list(args.categories)
+    if args.categories_file:
+        with open(args.categories_file, encoding='utf-8') as f:
+            categories += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    categories = expand_categories(categories or NotebookSpider.start_urls, _parse_price_ranges(args.price_ranges))
+
+    run(categories, args.processes, args.max_pages, os.path.abspath(args.output), args.db, args.replay, args.settings)
@@ -0,0 +1,345 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from functools import lru_cache
+
+from sqlalchemy import (
+    Column, DateTime, Float, Index, Integer, MetaData, String, Table, case, cast, create_engine, delete, func,
+    insert, inspect, select, text
+)
+
+# .env com as credenciais do MySQL (mesmo arquivo usado pelo transform e pelo dashboard)
+ENV_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'transform', '.env')
+
+metadata = MetaData()
+
+produtos = Table(
+    'produtos',
+    metadata,
+    Column('product_id', String(32), primary_key=True),
+    Column('url', String(1024)),
+    Column('brand', String(255)),
+    Column('name', String(512)),
+    Column('seller', String(255)),
+    Column('old_price', Float),
+    Column('new_price', Float),
+    Column('discount', Float),
+    Column('reviews_rating_number', Float),
+    Column('reviews_amount', Integer),
+    Column('scraped_at', DateTime),
+    # hash dos campos de HISTORY_COLUMNS na última coleta (detecção de mudança)
+    Column('content_hash', String(40)),
+    # MAX(scraped_at) = última carga (chave do cache do dashboard)
+    Index('ix_produtos_scraped_at', 'scraped_at'),
+)
+
+# Uma linha por produto a cada vez que preço/vendedor/avaliações mudam.
+# A chave (product_id, scraped_at) deixa as linhas de cada produto juntas e em
+# ordem de data (no InnoDB a chave primária é o índice clusterizado), então a
+# série de preços de um produto é uma leitura sequencial.
+produtos_historico = Table(
+    'produtos_historico',
+    metadata,
+    Column('product_id', String(32), primary_key=True),
+    Column('scraped_at', DateTime, primary_key=True),
+    Column('seller', String(255)),
+    Column('old_price', Float),
+    Column('new_price', Float),
+    Column('discount', Float),
+    Column('reviews_rating_number', Float),
+    Column('reviews_amount', Integer),
+    Column('content_hash', String(40)),
+    # consultas por período ("o que mudou esta semana")
+    Index('ix_produtos_historico_scraped_at', 'scraped_at'),
+)
+
+
+
+#? Tabelas de resumo mantidas a cada carga (o dashboard lê só estas)
+# Guardam somas e contagens, não médias: cada carga soma a contribuição nova de
+# um produto e tira a antiga, e a média é price_sum / price_count na leitura.
+# Marca/vendedor desconhecido fica na chave '' (chave primária não aceita NULL).
+def _summary_table(name, key):
+    return Table(
+        name,
+        metadata,
+        Column(key, String(255), primary_key=True),
+        Column('products', Integer, nullable=False, default=0),
+        Column('price_sum', Float, nullable=False, default=0.0),    # soma de new_price > 0
+        Column('price_count', Integer, nullable=False, default=0),
+        Column('rating_sum', Float, nullable=False, default=0.0),   # soma de reviews_rating_number > 0
+        Column('rating_count', Integer, nullable=False, default=0),
+    )
+
+
+resumo_marcas = _summary_table('resumo_marcas', 'brand')
+resumo_vendedores = _summary_table('resumo_vendedores', 'seller')
+
+# Histograma de new_price em faixas de PRICE_BUCKET reais (bucket = início da faixa)
+PRICE_BUCKET = 250
+resumo_precos = Table(
+    'resumo_precos',
+    metadata,
+    Column('bucket', Integer, primary_key=True),
+    Column('products', Integer, nullable=False, default=0),
+)
+
+SUMMARY_TABLES = (resumo_marcas, resumo_vendedores, resumo_precos)
+
+PRODUCT_COLUMNS = [c.name for c in produtos.columns if c.name != 'content_hash']
+HISTORY_COLUMNS = ['seller', 'old_price', 'new_price', 'discount', 'reviews_rating_number', 'reviews_amount']
+
+
+def database_url():
+    """
+    URL do banco de destino.
+
+    DATABASE_URL (ex: sqlite:///produtos.sqlite para testes locais) tem
+    prioridade; senão monta a URL do MySQL com as variáveis do .env.
+    """
+    if os.getenv('DATABASE_URL'):
+        return os.getenv('DATABASE_URL')
+
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=ENV_PATH)
+
+    host = os.getenv("MYSQL_HOST")
+    port = os.getenv("MYSQL_PORT")
+    user = os.getenv("MYSQL_USER")
+    password = os.getenv("MYSQL_PASSWORD")
+    database = os.getenv("MYSQL_DATABASE")
+    return f'mysql+pymysql://{user}:{password}@{host}:{port}/{database}'
+
+
+@lru_cache(maxsize=None)
+def get_engine(url=None):
+    """
+    Um engine (com pool de conexões) por URL, reaproveitado em todo o processo.
+    """
+    url = url or database_url()
+    if url.startswith('sqlite'):
+        return create_engine(url)
+    # pre_ping/recycle: o MySQL derruba conexões ociosas depois de algumas horas
+    return create_engine(url, pool_size=5, max_overflow=5, pool_pre_ping=True, pool_recycle=3600)
+
+
+def create_tables(engine):
+    """
+    Cria as tabelas que faltam. Bancos criados antes do histórico ganham a
+    coluna produtos.content_hash e os índices novos (o create_all não altera
+    tabelas existentes). Resumos recém-criados são preenchidos a partir de
+    produtos.
+    """
+    missing_summaries = [t for t in SUMMARY_TABLES if not inspect(engine).has_table(t.name)]
+    metadata.create_all(engine, checkfirst=True)
+    columns = {c['name'] for c in inspect(engine).get_columns('produtos')}
+    if 'content_hash' not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE produtos ADD COLUMN content_hash VARCHAR(40)"))
+    for table in metadata.tables.values():
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    if missing_summaries:
+        rebuild_summaries(engine)
+
+
+def _insert(engine, table):
+    if engine.dialect.name == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+    elif engine.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Banco não suportado para upsert: {engine.dialect.name}")
+    return insert(table)
+
+
+def _upsert_statement(engine, table, rows):
+    """INSERT de várias linhas que atualiza as já existentes (mesma chave primária)."""
+    keys = [c.name for c in table.primary_key]
+    stmt = _insert(engine, table).values(rows)
+    updates = [c.name for c in table.columns if c.name not in keys]
+    if engine.dialect.name == 'mysql':
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in updates})
+    return stmt.on_conflict_do_update(index_elements=keys, set_={c: stmt.excluded[c] for c in updates})
+
+
+def _increment_statement(engine, table, rows):
+    """INSERT de várias linhas que SOMA os valores nas linhas já existentes."""
+    keys = [c.name for c in table.primary_key]
+    stmt = _insert(engine, table).values(rows)
+    updates = [c.name for c in table.columns if c.name not in keys]
+    if engine.dialect.name == 'mysql':
+        return stmt.on_duplicate_key_update({c: table.c[c] + stmt.inserted[c] for c in updates})
+    return stmt.on_conflict_do_update(index_elements=keys, set_={c: table.c[c] + stmt.excluded[c] for c in updates})
+
+
+def _unique(table, rows):
+    """A mesma chave duas vezes no lote: fica a última."""
+    keys = [c.name for c in table.primary_key]
+    return list({tuple(row[k] for k in keys): row for row in rows}.values())
+
+
+def upsert(engine, table, rows):
+    """
+    Grava `rows` (lista de dicts) com um único INSERT de várias linhas; as que
+    já existem (mesma chave primária) são atualizadas no lugar.
+
+    Retorna:
+        quantidade de linhas enviadas
+    """
+    if not rows:
+        return 0
+
+    rows = _unique(table, rows)
+    with engine.begin() as conn:
+        conn.execute(_upsert_statement(engine, table, rows))
+    return len(rows)
+
+
+def content_hash(row):
+    """Hash dos campos acompanhados no histórico (preços, vendedor, avaliações)."""
+    values = json.dumps([row.get(c) for c in HISTORY_COLUMNS], ensure_ascii=False)
+    return hashlib.sha1(values.encode('utf-8')).hexdigest()
+
+
+#? Manutenção incremental dos resumos
+def _positive(value):
+    return value is not None and value > 0
+
+
+def _contribution(row):
+    """(products, price_sum, price_count, rating_sum, rating_count) de um produto."""
+    price, rating = row['new_price'], row['reviews_rating_number']
+    return (
+        1,
+        price if _positive(price) else 0.0,
+        1 if _positive(price) else 0,
+        rating if _positive(rating) else 0.0,
+        1 if _positive(rating) else 0,
+    )
+
+
+def _summary_deltas(old_rows, new_rows):
+    """
+    Quanto muda em cada linha dos resumos quando os produtos passam de
+    old_rows (estado no banco, None = produto novo) para new_rows.
+
+    Retorna:
+        dict tabela -> lista de linhas com os incrementos (sem as que ficam em zero)
+    """
+    deltas = {table: {} for table in SUMMARY_TABLES}
+
+    def add(row, sign):
+        contribution = _contribution(row)
+        for table, key in ((resumo_marcas, 'brand'), (resumo_vendedores, 'seller')):
+            acc = deltas[table].setdefault(row[key] or '', [0, 0.0, 0, 0.0, 0])
+            for i, value in enumerate(contribution):
+                acc[i] += sign * value
+        if _positive(row['new_price']):
+            bucket = int(row['new_price'] // PRICE_BUCKET * PRICE_BUCKET)
+            acc = deltas[resumo_precos].setdefault(bucket, [0])
+            acc[0] += sign
+
+    for old, new in zip(old_rows, new_rows):
+        if old is not None:
+            add(old, -1)
+        add(new, +1)
+
+    result = {}
+    for table, by_key in deltas.items():
+        key = table.primary_key.columns.values()[0].name
+        values = [c.name for c in table.columns if c.name != key]
+        result[table] = [
+            {key: k, **dict(zip(values, acc))}
+            for k, acc in by_key.items()
+            if any(acc)
+        ]
+    return result
+
+
+def rebuild_summaries(engine):
+    """Recalcula os resumos do zero a partir de produtos (criação ou correção)."""
+    price_ok = produtos.c.new_price > 0
+    rating_ok = produtos.c.reviews_rating_number > 0
+    aggregates = [
+        func.count(),
+        func.coalesce(func.sum(case((price_ok, produtos.c.new_price), else_=0.0)), 0.0),
+        func.coalesce(func.sum(case((price_ok, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((rating_ok, produtos.c.reviews_rating_number), else_=0.0)), 0.0),
+        func.coalesce(func.sum(case((rating_ok, 1), else_=0)), 0),
+    ]
+
+    # início da faixa de preço; o SQLite não tem FLOOR, mas o CAST trunca (= floor para preço > 0)
+    ratio = produtos.c.new_price / PRICE_BUCKET
+    floor = func.floor(ratio) if engine.dialect.name == 'mysql' else cast(ratio, Integer)
+    bucket = (floor * PRICE_BUCKET).label('bucket')
+
+    with engine.begin() as conn:
+        for table in SUMMARY_TABLES:
+            conn.execute(delete(table))
+        for table, column in ((resumo_marcas, produtos.c.brand), (resumo_vendedores, produtos.c.seller)):
+            key = func.coalesce(column, '')
+            conn.execute(insert(table).from_select(
+                [c.name for c in table.columns],
+                select(key, *aggregates).group_by(key),
+            ))
+        conn.execute(insert(resumo_precos).from_select(
+            ['bucket', 'products'],
+            select(bucket, func.count()).where(price_ok).group_by(bucket),
+        ))
+
+
+def save_products(engine, rows):
+    """
+    Upsert de um lote em produtos + histórico só do que mudou + resumos.
+
+    O hash de cada produto do lote é comparado com o content_hash salvo em
+    produtos; produtos novos ou com hash diferente ganham uma linha em
+    produtos_historico. Os resumos recebem a diferença entre a versão
+    salva e a nova de cada produto. Tudo na mesma transação.
+
+    Retorna:
+        (produtos gravados, linhas novas no histórico)
+    """
+    if not rows:
+        return 0, 0
+
+    rows = [{**row, 'content_hash': content_hash(row)} for row in _unique(produtos, rows)]
+
+    with engine.begin() as conn:
+        ids = [row['product_id'] for row in rows]
+        # FOR UPDATE: duas cargas em paralelo não somam a mesma diferença duas vezes
+        query = (
+            select(
+                produtos.c.product_id, produtos.c.content_hash, produtos.c.brand,
+                produtos.c.seller, produtos.c.new_price, produtos.c.reviews_rating_number,
+            )
+            .where(produtos.c.product_id.in_(ids))
+            .with_for_update()
+        )
+        saved = {row.product_id: row._asdict() for row in conn.execute(query)}
+
+        old_rows = [saved.get(row['product_id']) for row in rows]
+        changed = [
+            {c.name: row.get(c.name) for c in produtos_historico.columns}
+            for row, old in zip(rows, old_rows)
+            if old is None or old['content_hash'] != row['content_hash']
+        ]
+        if changed:
+            conn.execute(_upsert_statement(engine, produtos_historico, _unique(produtos_historico, changed)))
+        conn.execute(_upsert_statement(engine, produtos, rows))
+
+        for table, deltas in _summary_deltas(old_rows, rows).items():
+            if deltas:
+                conn.execute(_increment_statement(engine, table, deltas))
+
+    return len(rows), len(changed)
+
+
+def product_row(item):
+    """Dict do item (já normalizado) -> linha da tabela produtos."""
+    row = {c: item.get(c) for c in PRODUCT_COLUMNS}
+    if isinstance(row['scraped_at'], str):
+        row['scraped_at'] = datetime.fromisoformat(row['scraped_at'])
+    return row
@@ -0,0 +1,73 @@
+import re
+from email.utils import parsedate_to_datetime
+from time import time
+
+from scrapy.extensions.httpcache import RFC2616Policy
+
+
+class FreshnessPolicy(RFC2616Policy):
+    """
+    Política do cache HTTP com validade definida por URL.
+
+    HTTPCACHE_FRESHNESS_RULES é uma lista de (regex, segundos): a primeira
+    regra que casa com a URL diz por quanto tempo a página salva vale sem ir
+    à rede, mesmo que o servidor mande no-cache/no-store. Vencido esse prazo,
+    a requisição sai com If-None-Match / If-Modified-Since (ETag e
+    Last-Modified da resposta salva) e um 304 reaproveita a página do disco.
+
+    URLs sem regra seguem o RFC2616Policy normal do Scrapy. A idade e os
+    validadores das URLs com regra saem só dos cabeçalhos (Date, Age, ETag,
+    Last-Modified), sem depender de métodos internos do RFC2616Policy.
+    """
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.rules = [
+            (re.compile(pattern), seconds)
+            for pattern, seconds in settings.getlist('HTTPCACHE_FRESHNESS_RULES')
+        ]
+
+    def _lifetime(self, url):
+        for pattern, seconds in self.rules:
+            if pattern.search(url):
+                return seconds
+        return None
+
+    def should_cache_response(self, response, request):
+        if self._lifetime(request.url) is not None:
+            return response.status == 200
+        return super().should_cache_response(response, request)
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        lifetime = self._lifetime(request.url)
+        if lifetime is None:
+            return super().is_cached_response_fresh(cachedresponse, request)
+
+        if _current_age(cachedresponse, time()) < lifetime:
+            return True
+
+        # vencida: pergunta ao servidor se mudou (304 = usa a do cache)
+        if b'Last-Modified' in cachedresponse.headers:
+            request.headers[b'If-Modified-Since'] = cachedresponse.headers[b'Last-Modified']
+        if b'ETag' in cachedresponse.headers:
+            request.headers[b'If-None-Match'] = cachedresponse.headers[b'ETag']
+        return False
+
+
+def _current_age(response, now):
+    """
+    Idade da resposta salva em segundos: agora - Date, ou o Age do servidor se
+    for maior. Sem Date (ou Date inválido) conta a partir de agora, como o Scrapy.
+    """
+    age = 0.0
+    date = response.headers.get(b'Date')
+    if date:
+        try:
+            age = max(age, now - parsedate_to_datetime(date.decode('latin-1')).timestamp())
+        except (TypeError, ValueError):
+            pass
+    try:
+        age = max(age, int(response.headers.get(b'Age') or 0))
+    except ValueError:
+        pass
+    return age
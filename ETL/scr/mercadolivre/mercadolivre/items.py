@@ -7,6 +7,16 @@ import scrapy
 
 
 class MercadolivreItem(scrapy.Item):
-    # define the fields for your item here like:
-    # name = scrapy.Field()
-    pass
+    # O spider preenche os textos como aparecem na página; o NormalizationPipeline
+    # (pipelines.py) converte para os tipos indicados ao lado antes do feed/banco.
+    product_id = scrapy.Field()             # str, id estável do anúncio ("MLB1234567")
+    url = scrapy.Field()                    # str | None, link do produto
+    brand = scrapy.Field()                  # str | None
+    name = scrapy.Field()                   # str
+    seller = scrapy.Field()                 # str | None ("Por Loja X " -> "Loja X")
+    old_price = scrapy.Field()              # float | None ("2.540" -> 2540.0)
+    new_price = scrapy.Field()              # float | None
+    discount = scrapy.Field()               # float | None, % de desconto de old_price para new_price
+    reviews_rating_number = scrapy.Field()  # float | None ("4.8" -> 4.8)
+    reviews_amount = scrapy.Field()         # int | None ("(123)" -> 123)
+    scraped_at = scrapy.Field()             # str, data/hora UTC da coleta (ISO 8601)
@@ -0,0 +1,235 @@
+# Define your item pipelines here
+#
+# Don't forget to add your pipeline to the ITEM_PIPELINES setting
+# See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
+
+import hashlib
+import logging
+import re
+import sqlite3
+from datetime import datetime, timezone
+
+from itemadapter import ItemAdapter
+from scrapy.exceptions import DropItem
+
+from mercadolivre.db import create_tables, get_engine, product_row, save_products
+
+logger = logging.getLogger(__name__)
+
+
+def parse_price(text):
+    """
+    Preço no formato brasileiro -> float.
+
+    "2.540" -> 2540.0 / "1.234,56" -> 1234.56 / None ou "" -> None
+    (números já convertidos passam direto)
+    """
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    text = str(text).strip().replace('.', '').replace(',', '.')
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse_reviews_amount(text):
+    """Quantidade de avaliações: "(123)" -> 123."""
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return int(text)
+    digits = re.sub(r'\D', '', str(text))
+    return int(digits) if digits else None
+
+
+def parse_rating(text):
+    """Nota média: "4.8" -> 4.8."""
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    try:
+        return float(str(text).strip().replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def clean_text(text, prefix=None):
+    """Tira espaços das pontas (e um prefixo como "Por "); vazio vira None."""
+    if text is None:
+        return None
+    text = text.strip()
+    if prefix and text.startswith(prefix):
+        text = text[len(prefix):].strip()
+    return text or None
+
+
+def product_id(url, name, seller):
+    """
+    Id estável do produto: o código MLB do link (".../MLB-1234567-notebook" ->
+    "MLB1234567"); sem link reconhecível, um hash de nome + vendedor.
+    """
+    match = re.search(r'MLB-?(\d+)', url or '')
+    if match:
+        return f"MLB{match.group(1)}"
+    digest = hashlib.sha1(f"{name}|{seller}".encode('utf-8')).hexdigest()
+    return f"H{digest[:31]}"
+
+
+def discount_percent(old_price, new_price):
+    """Desconto em % de old_price para new_price (None se faltar algum preço)."""
+    if not old_price or new_price is None:
+        return None
+    return round((old_price - new_price) / old_price * 100, 2)
+
+
+def normalize(record):
+    """
+    Versão limpa de um registro do spider (dict com os campos do MercadolivreItem).
+
+    Pode ser aplicada de novo sobre um registro já normalizado (ex: no transform)
+    sem mudar nada; scraped_at só é preenchido se ainda não existir.
+
+    Retorna:
+        dict normalizado, ou None se o registro não tem nome (card vazio ou anúncio)
+    """
+    name = clean_text(record.get('name'))
+    if name is None:
+        return None
+
+    seller = clean_text(record.get('seller'), prefix='Por ')
+    old_price = parse_price(record.get('old_price'))
+    new_price = parse_price(record.get('new_price'))
+
+    return {
+        'product_id': record.get('product_id') or product_id(record.get('url'), name, seller),
+        'url': record.get('url'),
+        'brand': clean_text(record.get('brand')),
+        'name': name,
+        'seller': seller,
+        'old_price': old_price,
+        'new_price': new_price,
+        'discount': discount_percent(old_price, new_price),
+        'reviews_rating_number': parse_rating(record.get('reviews_rating_number')),
+        'reviews_amount': parse_reviews_amount(record.get('reviews_amount')),
+        'scraped_at': record.get('scraped_at')
+        or datetime.now(timezone.utc).replace(tzinfo=None).isoformat(timespec='seconds'),
+    }
+
+
+class NormalizationPipeline:
+    """
+    Limpa cada item durante o crawl: preços e avaliações viram números e o
+    desconto já sai calculado, então o transform/dashboard recebem registros
+    prontos, sem outra passada pelo data.json inteiro.
+    """
+
+    def process_item(self, item, spider=None):
+        adapter = ItemAdapter(item)
+        clean = normalize(adapter.asdict())
+        if clean is None:
+            raise DropItem("Produto sem nome (card vazio ou anúncio)")
+
+        for field, value in clean.items():
+            adapter[field] = value
+        return item
+
+
+class DedupPipeline:
+    """
+    Descarta produtos que outro processo/categoria do mesmo crawl já coletou.
+
+    Os product_id vistos ficam num SQLite compartilhado (DEDUP_DB), que
+    vários processos do crawl.py usam ao mesmo tempo; o INSERT OR IGNORE
+    decide atomicamente quem fica com o produto. Sem DEDUP_DB não faz nada.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.conn = None
+        self.dropped = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(path=crawler.settings.get('DEDUP_DB'))
+
+    def open_spider(self, spider=None):
+        if not self.path:
+            return
+        # autocommit + WAL: cada INSERT é visível na hora para os outros processos
+        self.conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS fingerprints (product_id TEXT PRIMARY KEY)")
+
+    def process_item(self, item, spider=None):
+        if self.conn is None:
+            return item
+
+        product = ItemAdapter(item).get('product_id')
+        inserted = self.conn.execute(
+            "INSERT OR IGNORE INTO fingerprints (product_id) VALUES (?)", (product,)
+        ).rowcount
+        if not inserted:
+            self.dropped += 1
+            raise DropItem(f"Produto repetido: {product}")
+        return item
+
+    def close_spider(self, spider=None):
+        if self.conn is not None:
+            self.conn.close()
+            logger.info("%s produtos repetidos descartados", self.dropped)
+
+
+class MySQLPipeline:
+    """
+    Grava os produtos no banco enquanto o crawl acontece, em lotes de
+    DB_BATCH_SIZE itens com upsert pelo product_id: a memória usada não
+    depende do tamanho do crawl e cada execução só atualiza o que veio.
+    Produtos novos ou com preço/avaliações diferentes também entram em
+    produtos_historico.
+
+    O banco vem de DATABASE_URL (setting ou variável de ambiente; ex:
+    sqlite:///produtos.sqlite para testar sem MySQL) ou do .env do transform.
+    Fora do ITEM_PIPELINES padrão: o NotebookSpider o liga quando há
+    DATABASE_URL, e o crawl.py quando recebe --db.
+    """
+
+    def __init__(self, url=None, batch_size=500):
+        self.url = url
+        self.batch_size = batch_size
+        self.buffer = []
+        self.total = 0
+        self.changed = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            url=crawler.settings.get('DATABASE_URL'),
+            batch_size=crawler.settings.getint('DB_BATCH_SIZE', 500),
+        )
+
+    def open_spider(self, spider=None):
+        self.engine = get_engine(self.url)
+        create_tables(self.engine)
+
+    def process_item(self, item, spider=None):
+        self.buffer.append(product_row(ItemAdapter(item).asdict()))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+        return item
+
+    def flush(self):
+        saved, changed = save_products(self.engine, self.buffer)
+        self.total += saved
+        self.changed += changed
+        self.buffer = []
+
+    def close_spider(self, spider=None):
+        self.flush()
+        logger.info(
+            "%s produtos gravados (%s com mudança no histórico) em %s",
+            self.total, self.changed, self.engine.url.render_as_string()
+        )
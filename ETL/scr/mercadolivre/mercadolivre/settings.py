@@ -27,7 +27,9 @@ ROBOTSTXT_OBEY = True
 # See also autothrottle settings and docs
 #DOWNLOAD_DELAY = 3
 # The download delay setting will honor only one of:
-#CONCURRENT_REQUESTS_PER_DOMAIN = 16
+# As páginas da listagem são agendadas todas de uma vez (ver spiders/notebook.py):
+# este é o número de páginas do Mercado Livre baixadas em paralelo
+CONCURRENT_REQUESTS_PER_DOMAIN = 8
 #CONCURRENT_REQUESTS_PER_IP = 16
 
 # Disable cookies (enabled by default)
@@ -62,9 +64,31 @@ ROBOTSTXT_OBEY = True
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "mercadolivre.pipelines.MercadolivrePipeline": 300,
-#}
+ITEM_PIPELINES = {
+    "mercadolivre.pipelines.NormalizationPipeline": 300,
+    "mercadolivre.pipelines.DedupPipeline": 350,
+}
+
+# SQLite com os product_id já coletados neste crawl (o crawl.py cria um por
+# execução e divide entre os processos); None = sem deduplicação
+DEDUP_DB = None
+
+# Banco de destino do MySQLPipeline. O pipeline só entra no crawl quando DATABASE_URL
+# é informado (setting ou variável de ambiente) ou pelo crawl.py --db (que sem
+# DATABASE_URL usa o MySQL do .env em ../transform/.env); sem ele o crawl só gera o
+# feed e a carga fica com o transform. Ex: scrapy crawl notebook -s DATABASE_URL=sqlite:///produtos.sqlite
+DATABASE_URL = None
+DB_BATCH_SIZE = 500
+
+# Feed em JSON Lines (um produto por linha), sempre acrescentado ao fim do arquivo:
+# o transform (../transform/transform.py) lê só as linhas novas desde o último checkpoint
+FEEDS = {
+    "data.jsonl": {
+        "format": "jsonlines",
+        "encoding": "utf8",
+        "overwrite": False,
+    },
+}
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -81,11 +105,20 @@ ROBOTSTXT_OBEY = True
 
 # Enable and configure HTTP caching (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
-#HTTPCACHE_ENABLED = True
-#HTTPCACHE_EXPIRATION_SECS = 0
-#HTTPCACHE_DIR = "httpcache"
-#HTTPCACHE_IGNORE_HTTP_CODES = []
-#HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+# Cache em disco (.scrapy/httpcache): páginas dentro do prazo não são baixadas de novo e
+# as vencidas são revalidadas com ETag/Last-Modified (ver mercadolivre/httpcache.py).
+# Para reprocessar só o que está no cache, sem rede: scrapy crawl notebook -a replay=1
+HTTPCACHE_ENABLED = True
+HTTPCACHE_EXPIRATION_SECS = 0
+HTTPCACHE_DIR = "httpcache"
+HTTPCACHE_GZIP = True
+HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+HTTPCACHE_POLICY = "mercadolivre.httpcache.FreshnessPolicy"
+# (regex da URL, segundos de validade): a primeira que casar vale
+HTTPCACHE_FRESHNESS_RULES = [
+    (r"lista\.mercadolivre\.com\.br", 6 * 3600),  # listagens: preços mudam ao longo do dia
+    (r"/robots\.txt$", 24 * 3600),
+]
 
 # Set settings whose default value is deprecated to a future-proof value
 TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
@@ -1,31 +1,111 @@
+import os
+import re
+
 import scrapy
 
+from mercadolivre.items import MercadolivreItem
+
+# O Mercado Livre mostra 48 produtos por página de listagem
+ITEMS_PER_PAGE = 48
+
+
+def _insert_filter(url, part):
+    """Põe um filtro (ex: "_Desde_49") logo depois do primeiro trecho do último pedaço da URL."""
+    base, _, segment = url.rstrip('/').rpartition('/')
+    head, sep, tail = segment.partition('_')
+    return f"{base}/{head}{part}{sep}{tail}"
+
+
+def price_range_url(url, low, high):
+    """
+    Mesma listagem só com a faixa de preço [low, high]:
+    .../computador_PriceRange_800-2500 -> .../computador_PriceRange_0-800
+    """
+    url = re.sub(r'_PriceRange_\d+-\d+', '', url)
+    return _insert_filter(url, f"_PriceRange_{low}-{high}")
+
+
+def page_url(url, page, items_per_page=ITEMS_PER_PAGE):
+    """
+    URL da página `page` (1, 2, 3...) de uma listagem do Mercado Livre.
+
+    A paginação usa o offset do primeiro produto da página no último trecho
+    da URL: .../computador_PriceRange_800-2500 -> .../computador_Desde_49_PriceRange_800-2500
+    """
+    if page <= 1:
+        return url
+    return _insert_filter(url, f"_Desde_{(page - 1) * items_per_page + 1}")
+
 
 class NotebookSpider(scrapy.Spider):
     name = "notebook"
     allowed_domains = ["mercadolivre.com.br"]
     start_urls = ["https://lista.mercadolivre.com.br/informatica/computador_PriceRange_800-2500_NoIndex_True"]
-    page_count = 1
     max_pages = 30
 
-    def parse(self, response):
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        if spider.replay:
+            # tudo sai do cache HTTP (HTTPCACHE_DIR): página que não está lá é
+            # ignorada em vez de baixada, então nenhuma requisição vai à rede
+            crawler.settings.set('HTTPCACHE_ENABLED', True, priority='spider')
+            crawler.settings.set('HTTPCACHE_POLICY', 'scrapy.extensions.httpcache.DummyPolicy', priority='spider')
+            crawler.settings.set('HTTPCACHE_IGNORE_MISSING', True, priority='spider')
+            crawler.settings.set('HTTPCACHE_EXPIRATION_SECS', 0, priority='spider')
+            crawler.settings.set('ROBOTSTXT_OBEY', False, priority='spider')
+        if crawler.settings.get('DATABASE_URL') or os.environ.get('DATABASE_URL'):
+            # banco informado: grava durante o crawl (sem ele, só o feed; a carga fica com o transform)
+            pipelines = crawler.settings.getdict('ITEM_PIPELINES')
+            pipelines.setdefault('mercadolivre.pipelines.MySQLPipeline', 400)
+            crawler.settings.set('ITEM_PIPELINES', pipelines, priority=crawler.settings.getpriority('ITEM_PIPELINES'))
+        return spider
+
+    def __init__(self, categories=None, max_pages=None, replay=False, *args, **kwargs):
+        """
+        Argumentos opcionais (scrapy crawl notebook -a ...):
+
+        - categories: URLs de listagem separadas por vírgula (padrão: start_urls)
+        - max_pages: páginas por categoria (padrão: 30)
+        - replay: 1 = processa só as páginas salvas no cache HTTP, sem rede
+        """
+        super().__init__(*args, **kwargs)
+        if categories:
+            self.start_urls = [url.strip() for url in categories.split(',') if url.strip()]
+        if max_pages is not None:
+            self.max_pages = int(max_pages)
+        self.replay = str(replay).lower() in ('1', 'true', 'yes', 'sim')
+
+    def start_requests(self):
+        # Todas as páginas de todas as categorias entram na fila de uma vez:
+        # o Scrapy baixa até CONCURRENT_REQUESTS delas em paralelo, em vez de
+        # esperar cada página para descobrir o link da próxima.
+        for url in self.start_urls:
+            for page in range(1, self.max_pages + 1):
+                yield scrapy.Request(page_url(url, page), callback=self.parse, cb_kwargs={'page': page})
+
+    async def start(self):
+        for request in self.start_requests():
+            yield request
+
+    def parse(self, response, page=1):
         products = response.css('div.ui-search-result__wrapper')
-        
+
+        # página além da última da categoria: nada a extrair
+        if not products:
+            self.logger.info("Página %s sem produtos: %s", page, response.url)
+            return
+
         for product in products:
             prices = product.css('span.andes-money-amount__fraction::text').getall()
 
-            yield {
-                'brand': product.css('span.poly-component__brand::text').get(),
-                'name': product.css('a.poly-component__title::text').get(),
-                'seller': product.css('span.poly-component__seller::text').get(),
-                'old_price': prices[0] if len(prices) > 0 else None, 
-                'new_price': prices[1] if len(prices) > 1 else None, 
-                'reviews_rating_number': product.css('span.poly-reviews__rating::text').get(),
-                'reviews_amount': product.css('span.poly-reviews__total::text').get()
-            }
-
-        if self.page_count < self.max_pages:
-            next_page = response.css('li.andes-pagination__button.andes-pagination__button--next a::attr(href)').get()
-            if next_page:
-                self.page_count += 1
-                yield response.follow(url=next_page, callback=self.parse)
+            yield MercadolivreItem(
+                url=product.css('a.poly-component__title::attr(href)').get(),
+                brand=product.css('span.poly-component__brand::text').get(),
+                name=product.css('a.poly-component__title::text').get(),
+                seller=product.css('span.poly-component__seller::text').get(),
+                old_price=prices[0] if len(prices) > 0 else None,
+                new_price=prices[1] if len(prices) > 1 else None,
+                reviews_rating_number=product.css('span.poly-reviews__rating::text').get(),
+                reviews_amount=product.css('span.poly-reviews__total::text').get()
+            )
@@ -0,0 +1,145 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+from itertools import islice
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# o pacote do Scrapy (normalização, tabela e upsert) fica em ../mercadolivre
+sys.path.insert(0, os.path.join(HERE, '..', 'mercadolivre'))
+
+from mercadolivre.db import create_tables, get_engine, product_row, save_products  # noqa: E402
+from mercadolivre.pipelines import normalize  # noqa: E402
+
+FEED_PATH = os.path.join(HERE, '..', 'mercadolivre', 'data.jsonl')
+CHECKPOINT_PATH = os.path.join(HERE, 'transform_checkpoint.json')
+CHUNK_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+#? Checkpoint: até onde (em bytes) o feed já foi carregado
+def _head_hash(path):
+    """Hash da primeira linha do feed: identifica se o arquivo foi trocado."""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.readline()).hexdigest()
+
+
+def read_checkpoint(checkpoint_path, feed_path):
+    """
+    Offset já processado do feed (0 se não há checkpoint, ou se o feed foi
+    recriado/truncado desde então).
+    """
+    if not os.path.exists(checkpoint_path):
+        return 0
+    with open(checkpoint_path, encoding='utf-8') as f:
+        checkpoint = json.load(f)
+
+    if checkpoint.get('head') != _head_hash(feed_path) or checkpoint['offset'] > os.path.getsize(feed_path):
+        logger.warning("Feed diferente do checkpoint: recomeçando do início")
+        return 0
+    return checkpoint['offset']
+
+
+def write_checkpoint(checkpoint_path, feed_path, offset):
+    """Grava o checkpoint num temporário + os.replace (nunca fica pela metade)."""
+    tmp = f"{checkpoint_path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'feed': os.path.abspath(feed_path), 'head': _head_hash(feed_path), 'offset': offset}, f)
+    os.replace(tmp, checkpoint_path)
+
+
+#? Pipeline de geradores: linhas -> registros limpos -> lotes
+def read_records(feed_path, offset=0):
+    """
+    Lê o feed JSON Lines a partir de `offset` (em bytes), uma linha por vez.
+
+    Uma linha sem "\\n" no fim ainda está sendo escrita pelo crawl e fica para
+    a próxima execução.
+
+    Gera:
+        (registro, offset logo depois da linha)
+    """
+    with open(feed_path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line), offset
+            except json.JSONDecodeError:
+                logger.warning("Linha inválida no feed (byte %s), ignorada", offset - len(line))
+
+
+def clean_records(records):
+    """Normaliza cada registro (idempotente: o feed já vem limpo do Scrapy)."""
+    for record, offset in records:
+        clean = normalize(record)
+        if clean is not None:
+            yield product_row(clean), offset
+
+
+def chunks(rows, size):
+    """
+    Agrupa em listas de até `size` linhas.
+
+    Gera:
+        (linhas, offset do fim do lote)
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield [row for row, _ in chunk], chunk[-1][1]
+
+
+def run(feed_path=FEED_PATH, checkpoint_path=CHECKPOINT_PATH, chunk_size=CHUNK_SIZE, url=None):
+    """
+    Carrega no banco só o que entrou no feed desde a última execução.
+
+    Cada lote vai para a tabela produtos com upsert pelo product_id (e o que
+    mudou para produtos_historico) e o checkpoint avança depois do commit: se
+    cair no meio, a próxima execução refaz no máximo um lote (sem duplicar,
+    por causa do upsert e do hash).
+
+    Retorna:
+        quantidade de produtos gravados nesta execução
+    """
+    if not os.path.exists(feed_path):
+        logger.warning("Feed %s não existe: nada a carregar", feed_path)
+        return 0
+
+    engine = get_engine(url)
+    create_tables(engine)
+
+    offset = read_checkpoint(checkpoint_path, feed_path)
+    total = changes = 0
+    for rows, end in chunks(clean_records(read_records(feed_path, offset)), chunk_size):
+        saved, changed = save_products(engine, rows)
+        total += saved
+        changes += changed
+        write_checkpoint(checkpoint_path, feed_path, end)
+        logger.info("%s produtos gravados, %s mudanças no histórico (offset %s)", total, changes, end)
+
+    return total
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    parser = argparse.ArgumentParser(description="Carrega o feed JSON Lines do Scrapy no banco (incremental)")
+    parser.add_argument('--feed', default=FEED_PATH, help="arquivo .jsonl gerado pelo crawl")
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--url', default=None, help="URL do banco (padrão: DATABASE_URL ou o .env)")
+    args = parser.parse_args()
+
+    total = run(args.feed, args.checkpoint, args.chunk_size, args.url)
+    print(f"Dados inseridos com sucesso no banco de dados! ({total} produtos)")
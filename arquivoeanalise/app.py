@@ -9,6 +9,9 @@ import streamlit as st
 from sqlalchemy import create_engine       # MySQL via SQLAlchemy
 import os
 
+# ? leitura/conversão dos dados (só pandas) fica no leitura.py
+from leitura import carregar_qualquer_formato, conversoes_robustas, ler_csv, padronizar_colunas
+
 # =========================
 # Configuração da página
 # =========================
@@ -31,85 +34,11 @@ Diego,41,Rio de Janeiro,2024-02-02,145.00
 Luiza,36,Curitiba,2023-11-21,410.99
 """
 
-def _padronizar_colunas(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    # ? strip() remove espaços em branco no início e fim. lower() deixa tudo minúsculo.
-    df.columns = [c.strip().lower() for c in df.columns]
-    # Renomear se necessário (tolerância a nomes similares)
-    aliases = {
-        "data_cadastro": "data_de_cadastro",
-        "data": "data_de_cadastro",
-        "valor": "valor_compras",
-        "compras": "valor_compras",
-    }
-    for antigo, novo in aliases.items():
-        # ? Só renomeia se existe a coluna com o nome alternativo (antigo)
-        #   e ainda não existe a coluna com o nome padronizado (novo).
-        #   Isso evita sobrescrever/duplicar caso o nome final já exista.
-        if antigo in df.columns and novo not in df.columns:
-            df.rename(columns={antigo: novo}, inplace=True)
-    return df
-
-def _conversoes_robustas(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    if "idade" in df.columns:
-        df["idade"] = pd.to_numeric(df["idade"], errors="coerce")
-
-    if "valor_compras" in df.columns:
-        df["valor_compras"] = (
-            df["valor_compras"]
-            .astype(str)
-            .str.replace(".", "", regex=False)  # remove milhar '1.234,56'
-            .str.replace(",", ".", regex=False) # troca vírgula por ponto
-        )
-        df["valor_compras"] = pd.to_numeric(df["valor_compras"], errors="coerce")
-
-    if "data_de_cadastro" in df.columns:
-        df["data_de_cadastro"] = pd.to_datetime(df["data_de_cadastro"], errors="coerce")
-
-    # ? limpa espaços em strings
-    for col in df.select_dtypes(include=["object"]).columns:
-        df[col] = df[col].astype(str).str.strip()
-
-    return df
-
-def carregar_qualquer_formato(file) -> pd.DataFrame:
-    """Recebe um arquivo do st.file_uploader e retorna um DataFrame."""
-    nome = file.name.lower()
-    data = file.read()
-
-    if nome.endswith((".csv", ".txt")):
-        # ? tenta detectar separador; se falhar, usa vírgula
-        try:
-            df = pd.read_csv(io.BytesIO(data), sep=None, engine="python")
-        except Exception:
-            df = pd.read_csv(io.BytesIO(data))
-    elif nome.endswith((".xlsx", ".xls")):
-        df = pd.read_excel(io.BytesIO(data))
-    elif nome.endswith(".json"):
-        # ? aceita JSON linha-a-linha (NDJSON) também
-        try:
-            df = pd.read_json(io.BytesIO(data), lines=True)
-        except ValueError:
-            df = pd.read_json(io.BytesIO(data))
-    elif nome.endswith(".parquet"):
-        df = pd.read_parquet(io.BytesIO(data))
-    else:
-        raise ValueError("Formato não suportado.")
-
-    # ? padroniza nomes + aplica conversões robustas
-    df = _padronizar_colunas(df)
-    df = _conversoes_robustas(df)
-    return df
-
 # ? Decorador do Streamlit que cacheia
 @st.cache_data
 # ? recebe o conteúdo do arquivo em bytes e devolve o dataframe em pandas
 def carregar_csv(conteudo_bytes: bytes) -> pd.DataFrame:
-    df = pd.read_csv(io.BytesIO(conteudo_bytes))
-    df = _padronizar_colunas(df)
-    df = _conversoes_robustas(df)
-    return df
+    return ler_csv(io.BytesIO(conteudo_bytes))
 
 @st.cache_data(ttl=300)
 def carregar_do_mysql(query: str) -> pd.DataFrame:
@@ -139,8 +68,8 @@ def carregar_do_mysql(query: str) -> pd.DataFrame:
     with engine.connect() as conn:
         df = pd.read_sql(query, conn)
 
-    df = _padronizar_colunas(df)
-    df = _conversoes_robustas(df)
+    df = padronizar_colunas(df)
+    df = conversoes_robustas(df)
     return df
 
 # ?help_text: opcional; texto do tooltip (aquele ícone de “i” do lado do KPI).
@@ -379,6 +308,8 @@ with aba_graficos:
         st.subheader("🏙️ Usuários por cidade")
         if "cidade" in df_filtrado.columns:
             contagem = df_filtrado["cidade"].value_counts().sort_values(ascending=False)
+            # ? cidade é categórica: esconde as cidades que o filtro tirou (contagem 0)
+            contagem = contagem[contagem > 0]
             st.bar_chart(contagem, use_container_width=True)
         else:
             st.info("Coluna **cidade** não encontrada no CSV.")
@@ -0,0 +1,299 @@
+# leitura.py
+# -*- coding: utf-8 -*-
+"""
+Leitura e conversão dos dados de usuários (arquivo, CSV de exemplo ou MySQL).
+
+Só pandas, sem Streamlit: o app.py importa daqui e os testes também.
+"""
+import csv
+import io
+import logging
+import warnings
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+logger = logging.getLogger(__name__)
+
+# Nomes alternativos aceitos para as colunas esperadas
+ALIASES = {
+    "data_cadastro": "data_de_cadastro",
+    "data": "data_de_cadastro",
+    "valor": "valor_compras",
+    "compras": "valor_compras",
+}
+
+# ? Colunas que o dashboard usa e o tipo de leitura de cada uma.
+#   Tudo entra como texto: a conversão tolerante a valores inválidos
+#   (to_numeric/to_datetime com coerce) fica em conversoes_robustas.
+COLUNAS_ESPERADAS = {
+    "nome": str,
+    "idade": str,
+    "cidade": str,
+    "data_de_cadastro": str,
+    "valor_compras": str,
+}
+
+# Tamanho da amostra usada para detectar o separador e o cabeçalho
+BYTES_AMOSTRA = 64 * 1024
+# Linhas por bloco na leitura de CSV grande
+LINHAS_POR_BLOCO = 200_000
+
+
+def padronizar_colunas(df: pd.DataFrame) -> pd.DataFrame:
+    # ? strip() remove espaços em branco no início e fim. lower() deixa tudo minúsculo.
+    #   set_axis/rename devolvem um DataFrame novo sem copiar os dados (copy-on-write).
+    df = df.set_axis([str(c).strip().lower() for c in df.columns], axis=1)
+    # Renomear se necessário (tolerância a nomes similares)
+    for antigo, novo in ALIASES.items():
+        # ? Só renomeia se existe a coluna com o nome alternativo (antigo)
+        #   e ainda não existe a coluna com o nome padronizado (novo).
+        #   Isso evita sobrescrever/duplicar caso o nome final já exista.
+        if antigo in df.columns and novo not in df.columns:
+            df = df.rename(columns={antigo: novo})
+    return df
+
+
+# Quantos valores não nulos olhar para detectar o formato de números e datas
+LINHAS_AMOSTRA = 1_000
+
+
+def _eh_texto(serie: pd.Series) -> bool:
+    return serie.dtype == object or isinstance(serie.dtype, pd.StringDtype)
+
+
+def _para_numero(serie: pd.Series, tipo: str) -> pd.Series:
+    """to_numeric com coerce, mas tenta antes o cast direto (bem mais rápido) quando tudo é válido."""
+    if _eh_texto(serie):
+        try:
+            return serie.astype(tipo)
+        except (ValueError, TypeError):
+            pass
+    return pd.to_numeric(serie, errors="coerce")
+
+
+# Formatos de data tentados primeiro, nesta ordem: ISO e depois o padrão brasileiro
+FORMATOS_DATA = ("%Y-%m-%d", "%d/%m/%Y")
+
+
+def _detectar_decimal(valores: pd.Series) -> str:
+    """
+    Separador decimal dos valores em texto, olhando só uma amostra:
+    "," para o formato brasileiro (1.234,56 / 1.234) e "." para 1234.56 / 1,234.56.
+
+    Regra: "," se algum valor tem casas decimais com vírgula, ou se há milhar
+    com ponto e nenhum valor com casas decimais de ponto; senão ".". Sem
+    nenhuma evidência (só inteiros) fica o padrão brasileiro.
+    """
+    amostra = valores.dropna().head(LINHAS_AMOSTRA).astype(str).str.strip()
+    # ? 1 ou 2 dígitos depois do separador = casas decimais; 3 dígitos = milhar ("1.234" é mil e pouco)
+    decimal_virgula = amostra.str.contains(r",\d{1,2}$").sum()
+    decimal_ponto = amostra.str.contains(r"\.\d{1,2}$").sum()
+    milhar_ponto = amostra.str.contains(r"\.\d{3}$").sum()
+
+    if decimal_virgula:
+        decimal = ","
+    elif decimal_ponto:
+        decimal = "."
+    else:
+        return ","
+
+    # ? amostra com os dois formatos: algum valor vai ser lido errado, então avisa
+    if decimal_ponto and (decimal_virgula or milhar_ponto):
+        logger.warning(
+            "Separador decimal ambíguo na coluna %s: %d valor(es) com decimal ',', %d com decimal '.' "
+            "e %d com milhar '.'; usando '%s'",
+            valores.name, decimal_virgula, decimal_ponto, milhar_ponto, decimal,
+        )
+    return decimal
+
+
+def _ano_dia_mes(formato: str) -> bool:
+    """ "%Y-%d-%m" e parecidos: ninguém grava assim, é o palpite errado de 2023-01-05."""
+    return formato.startswith("%Y") and "%d" in formato and "%m" in formato and formato.index("%d") < formato.index("%m")
+
+
+def _detectar_formato_data(valores: pd.Series):
+    """
+    Formato explícito das datas em texto, testado na amostra nesta ordem:
+    FORMATOS_DATA e depois o palpite do pandas para o 1º valor (ex.: com hora).
+
+    Um formato só troca o anterior se converter estritamente mais valores,
+    então datas ambíguas (2023-01-05, 05/01/2023) ficam com ISO / dia-mês.
+    None se nenhum servir.
+    """
+    from pandas.tseries.api import guess_datetime_format
+
+    amostra = valores.dropna().head(LINHAS_AMOSTRA).astype(str).str.strip()
+    if amostra.empty:
+        return None
+    candidatos = list(FORMATOS_DATA)
+    with warnings.catch_warnings():
+        # ? o palpite com dayfirst=False avisa quando só serve dia/mês: os dois são testados abaixo
+        warnings.simplefilter("ignore", UserWarning)
+        for dayfirst in (True, False):
+            formato = guess_datetime_format(amostra.iloc[0], dayfirst=dayfirst)
+            if formato and formato not in candidatos and not _ano_dia_mes(formato):
+                candidatos.append(formato)
+
+    melhor, convertidos = None, 0
+    for formato in candidatos:
+        n = pd.to_datetime(amostra, format=formato, errors="coerce").notna().sum()
+        if n > convertidos:
+            melhor, convertidos = formato, n
+    return melhor
+
+
+def _detectar_formatos(df: pd.DataFrame) -> dict:
+    """Separador decimal e formato de data, detectados uma vez (ex.: no 1º bloco do CSV)."""
+    formatos = {"decimal": ".", "formato_data": None}
+    if "valor_compras" in df.columns and _eh_texto(df["valor_compras"]):
+        formatos["decimal"] = _detectar_decimal(df["valor_compras"])
+    if "data_de_cadastro" in df.columns and _eh_texto(df["data_de_cadastro"]):
+        formatos["formato_data"] = _detectar_formato_data(df["data_de_cadastro"])
+    return formatos
+
+
+def conversoes_robustas(df: pd.DataFrame, decimal=None, formato_data=None) -> pd.DataFrame:
+    """
+    Converte os tipos das colunas esperadas (valores inválidos viram NaN/NaT).
+
+    - decimal / formato_data: formatos já detectados; se None, detecta neste df.
+    Colunas que já vêm tipadas (Parquet, MySQL) não são reconvertidas.
+    """
+    if decimal is None or formato_data is None:
+        detectados = _detectar_formatos(df)
+        decimal = detectados["decimal"] if decimal is None else decimal
+        formato_data = detectados["formato_data"] if formato_data is None else formato_data
+
+    # ? cópia rasa: as colunas novas não alteram o df de quem chamou, sem duplicar os dados
+    df = df.copy(deep=False)
+
+    if "idade" in df.columns:
+        df["idade"] = _para_numero(df["idade"], "int64")
+
+    if "valor_compras" in df.columns and _eh_texto(df["valor_compras"]):
+        valores = df["valor_compras"].astype(str)
+        # ? o formato já é conhecido: só as trocas daquele formato, vetorizadas
+        if decimal == ",":
+            valores = valores.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)  # '1.234,56'
+        else:
+            valores = valores.str.replace(",", "", regex=False)  # '1,234.56'
+        df["valor_compras"] = _para_numero(valores, "float64")
+    elif "valor_compras" in df.columns:
+        df["valor_compras"] = pd.to_numeric(df["valor_compras"], errors="coerce")
+
+    if "data_de_cadastro" in df.columns:
+        formato = formato_data if _eh_texto(df["data_de_cadastro"]) else None
+        df["data_de_cadastro"] = pd.to_datetime(df["data_de_cadastro"], format=formato, errors="coerce")
+
+    # ? limpa espaços em strings
+    for col in df.columns:
+        if _eh_texto(df[col]):
+            df[col] = df[col].astype(str).str.strip()
+
+    # ? poucas cidades repetidas em muitas linhas: categoria guarda cada nome uma vez só
+    if "cidade" in df.columns:
+        df["cidade"] = df["cidade"].astype("category")
+
+    return df
+
+
+def _mapear_colunas(cabecalho) -> dict:
+    """
+    Colunas do arquivo que viram colunas esperadas: {nome_original: nome_padrao}.
+    Mesma regra do padronizar_colunas: o nome exato ganha do alias.
+    """
+    padronizados = {c: str(c).strip().lower() for c in cabecalho}
+    mapa = {c: p for c, p in padronizados.items() if p in COLUNAS_ESPERADAS}
+    for original, padrao in padronizados.items():
+        novo = ALIASES.get(padrao)
+        if novo and novo not in mapa.values():
+            mapa[original] = novo
+    return mapa
+
+
+def _detectar_separador(amostra: str) -> str:
+    """Detecta o separador só pelas primeiras linhas; se falhar, usa vírgula."""
+    # ? descarta a última linha da amostra, que pode ter sido cortada no meio
+    linhas = amostra[: amostra.rfind("\n") + 1] or amostra
+    try:
+        return csv.Sniffer().sniff(linhas, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+
+def ler_csv(arquivo) -> pd.DataFrame:
+    """
+    Lê CSV/TXT em blocos com o engine C, carregando só as colunas esperadas.
+
+    O separador e o cabeçalho vêm de uma amostra do início do arquivo; cada
+    bloco já é padronizado e convertido antes de juntar, então o texto cru
+    de um arquivo grande nunca fica inteiro na memória.
+    """
+    amostra = arquivo.read(BYTES_AMOSTRA)
+    arquivo.seek(0)
+    if isinstance(amostra, bytes):
+        # ? utf-8-sig tira o BOM do "CSV UTF-8" do Excel, senão a 1ª coluna vira "\ufeffnome"
+        amostra = amostra.decode("utf-8-sig", errors="replace")
+
+    sep = _detectar_separador(amostra)
+    cabecalho = next(csv.reader(io.StringIO(amostra), delimiter=sep), [])
+    mapa = _mapear_colunas(cabecalho)
+
+    opcoes = {"sep": sep, "engine": "c", "chunksize": LINHAS_POR_BLOCO}
+    if mapa:
+        # ? sem nenhuma coluna conhecida, carrega tudo (como antes) para o usuário ver o arquivo
+        opcoes["usecols"] = list(mapa)
+        opcoes["dtype"] = {original: COLUNAS_ESPERADAS[padrao] for original, padrao in mapa.items()}
+
+    blocos, formatos = [], None
+    for bloco in pd.read_csv(arquivo, **opcoes):
+        bloco = padronizar_colunas(bloco)
+        # ? formato dos números e das datas detectado uma vez, no 1º bloco
+        if formatos is None:
+            formatos = _detectar_formatos(bloco)
+        blocos.append(conversoes_robustas(bloco, **formatos))
+    if not blocos:
+        return conversoes_robustas(padronizar_colunas(pd.DataFrame(columns=list(mapa) or cabecalho)))
+
+    df = pd.concat(blocos, ignore_index=True)
+    if "cidade" in df.columns:
+        # ? concat de categorias diferentes vira texto: une as categorias dos blocos
+        df["cidade"] = union_categoricals([b["cidade"] for b in blocos])
+    return df
+
+
+def carregar_qualquer_formato(file) -> pd.DataFrame:
+    """Recebe um arquivo do st.file_uploader e retorna um DataFrame."""
+    nome = file.name.lower()
+
+    # ? o UploadedFile já é um buffer em memória: lê direto dele, sem file.read() extra
+    if nome.endswith((".csv", ".txt")):
+        return ler_csv(file)
+    elif nome.endswith((".xlsx", ".xls")):
+        # ? lê só o cabeçalho para escolher as colunas; sem nenhuma conhecida, carrega tudo (como no CSV)
+        mapa = _mapear_colunas(pd.read_excel(file, nrows=0).columns)
+        file.seek(0)
+        df = pd.read_excel(file, usecols=list(mapa) or None)
+    elif nome.endswith(".json"):
+        # ? aceita JSON linha-a-linha (NDJSON) também
+        try:
+            df = pd.read_json(file, lines=True)
+        except ValueError:
+            file.seek(0)
+            df = pd.read_json(file)
+    elif nome.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        # ? parquet é colunar: lê do disco só as colunas esperadas
+        colunas = list(_mapear_colunas(pq.read_schema(file).names))
+        file.seek(0)
+        df = pd.read_parquet(file, columns=colunas or None)
+    else:
+        raise ValueError("Formato não suportado.")
+
+    # ? padroniza nomes + aplica conversões robustas
+    df = padronizar_colunas(df)
+    df = conversoes_robustas(df)
+    return df
@@ -0,0 +1,73 @@
+import io
+import logging
+
+import pandas as pd
+import pytest
+
+from leitura import carregar_qualquer_formato, conversoes_robustas, _detectar_decimal, _detectar_formato_data
+
+
+class Arquivo(io.BytesIO):
+    """Imita o UploadedFile do Streamlit (buffer em memória com .name)."""
+
+    def __init__(self, conteudo: bytes, name: str):
+        super().__init__(conteudo)
+        self.name = name
+
+
+@pytest.mark.parametrize("valores, esperado", [
+    (["2023-01-05", "2023-02-03"], "%Y-%m-%d"),     # ambígua: ISO, nunca %Y-%d-%m
+    (["2023-01-05"], "%Y-%m-%d"),
+    (["05/01/2023", "03/02/2023"], "%d/%m/%Y"),     # ambígua: dia/mês brasileiro
+    (["05/01/2023", "13/01/2023"], "%d/%m/%Y"),
+    (["01/13/2023", "01/05/2023"], "%m/%d/%Y"),     # só troca com mais valores convertidos
+    (["2023-06-01 10:00:00"], "%Y-%m-%d %H:%M:%S"),
+    (["sem data"], None),
+])
+def test_formato_data(valores, esperado):
+    assert _detectar_formato_data(pd.Series(valores)) == esperado
+
+
+@pytest.mark.parametrize("valores, esperado", [
+    (["1.234", "2.500"], ","),       # milhar brasileiro sem centavos
+    (["1.234,56", "10,5"], ","),
+    (["1234.56", "10.5"], "."),
+    (["1,234.56"], "."),
+    (["1234"], ","),
+    (["350.75", "1.234", "20.5"], "."),   # misturado: decimal com ponto vence o milhar
+    (["1.234,56", "20.5"], ","),          # misturado: decimal com vírgula vence
+])
+def test_separador_decimal(valores, esperado):
+    assert _detectar_decimal(pd.Series(valores)) == esperado
+
+
+@pytest.mark.parametrize("valores, ambiguo", [
+    (["350.75", "1.234", "20.5"], True),
+    (["1.234,56", "20.5"], True),
+    (["1.234,56", "1.234"], False),
+    (["1234.56", "10.5"], False),
+])
+def test_separador_decimal_avisa_amostra_ambigua(valores, ambiguo, caplog):
+    with caplog.at_level(logging.WARNING, logger="leitura"):
+        _detectar_decimal(pd.Series(valores, name="valor_compras"))
+    assert any("ambíguo" in r.getMessage() for r in caplog.records) == ambiguo
+
+
+def test_conversoes_datas_e_valores_ambiguos():
+    df = conversoes_robustas(pd.DataFrame({
+        "data_de_cadastro": ["2023-01-05", "2023-02-03"],
+        "valor_compras": ["1.234", "2.500"],
+        "cidade": [" Uberlândia", "Uberlândia "],
+    }))
+    assert df["data_de_cadastro"].tolist() == [pd.Timestamp("2023-01-05"), pd.Timestamp("2023-02-03")]
+    assert df["valor_compras"].tolist() == [1234.0, 2500.0]
+    assert isinstance(df["cidade"].dtype, pd.CategoricalDtype)
+    assert df["cidade"].cat.categories.tolist() == ["Uberlândia"]
+
+
+def test_csv_brasileiro_com_bom():
+    conteudo = "\ufeffNome;Data;Valor\nJoão;05/01/2023;1.350,75\n".encode("utf-8")
+    df = carregar_qualquer_formato(Arquivo(conteudo, "usuarios.csv"))
+    assert df.columns.tolist() == ["nome", "data_de_cadastro", "valor_compras"]
+    assert df.loc[0, "data_de_cadastro"] == pd.Timestamp("2023-01-05")
+    assert df.loc[0, "valor_compras"] == 1350.75
@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+import torch
+
+from features import checar_versao_features
+from modelos import PolicyDirichlet, PolicyMLP
+from portfolio_lote import KernelsPortfolio
+from vec_env import PortfolioVecEnv
+
+
+def carregar_policy(caminho, state_dim, num_actions, acao_continua=False):
+    """
+    Carrega uma PolicyMLP (ou PolicyDirichlet, com acao_continua=True) salva com torch.save.
+
+    Aceita tanto o state_dict puro da política quanto um checkpoint de
+    treino (dict com a chave "policy"). O checkpoint precisa ter sido treinado
+    com a VERSAO_FEATURES atual; o state_dict puro não guarda versão.
+    """
+    estado = torch.load(caminho, map_location="cpu")
+    if isinstance(estado, dict) and "policy" in estado:
+        checar_versao_features(estado.get("versao_features"), caminho)
+        estado = estado["policy"]
+
+    policy = (PolicyDirichlet if acao_continua else PolicyMLP)(state_dim, num_actions)
+    policy.load_state_dict(estado)
+    policy.eval()
+    return policy
+
+
+def janelas_walk_forward(num_steps, tamanho, passo, inicio=1):
+    """
+    Dias de início das janelas walk-forward.
+
+    Cada janela tem `tamanho` dias e a próxima começa `passo` dias depois.
+    Como no PortfolioEnv, o último dia dos dados nunca é operado.
+
+    Retorna:
+        array com o dia inicial de cada janela
+    """
+    ultimo_inicio = num_steps - 1 - tamanho
+    if ultimo_inicio < inicio:
+        raise ValueError(f"Janela de {tamanho} dias não cabe em {num_steps} dias de dados.")
+    return np.arange(inicio, ultimo_inicio + 1, passo)
+
+
+def _metricas(r_p, turnover, rewards):
+    """
+    Métricas de cada coluna (uma coluna = uma carteira) a partir das séries [dias, carteiras].
+    """
+    fatores = 1.0 + r_p
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # mesma punição de -10 do calcular_recompensa_portfolio quando a carteira "quebra"
+        log_ret = np.where(fatores <= 0, -10.0, np.log(fatores))
+
+    valor = np.cumprod(fatores, axis=0)
+    pico = np.maximum.accumulate(np.maximum(valor, 1.0), axis=0)
+    drawdown = valor / pico - 1
+
+    media = r_p.mean(axis=0)
+    desvio = r_p.std(axis=0, ddof=1) if len(r_p) > 1 else np.zeros(r_p.shape[1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(desvio > 0, media / desvio * np.sqrt(252), 0.0)
+
+    return {
+        "retorno_acumulado": valor[-1] - 1,
+        "log_ret": log_ret.sum(axis=0),
+        "sharpe": sharpe,
+        "max_drawdown": drawdown.min(axis=0),
+        "turnover_total": turnover.sum(axis=0),
+        "turnover_medio": turnover.mean(axis=0),
+        "reward_total": rewards.sum(axis=0),
+    }
+
+
+def avaliar_janelas(
+    policy,
+    ret,
+    r_media,
+    v_media,
+    dd,
+    regime_ids,
+    cluster_ids,
+    tamanho=126,
+    passo=21,
+    modo="deterministico",
+    amostras=1,
+    seed=0,
+    passo_acao=0.02,
+    max_weight=0.2,
+    lambda_dd=0.02,
+    lambda_tc=0.001,
+    datas=None
+):
+    """
+    Backtest walk-forward da política em todas as janelas ao mesmo tempo.
+
+    Cada janela (e cada amostra, no modo estocástico) vira uma carteira do
+    PortfolioVecEnv, então a política faz um único forward em lote por dia.
+    A recompensa é a mesma do ambiente de treino (calcular_recompensa_portfolio).
+
+    - policy: PolicyMLP treinada (ver carregar_policy)
+    - ret, r_media, v_media, dd, regime_ids, cluster_ids: dados (ex: conjunto de teste)
+    - tamanho: dias por janela
+    - passo: distância em dias entre o início de duas janelas
+    - modo: "deterministico" (argmax) ou "estocastico" (amostra da distribuição);
+      com PolicyDirichlet o determinístico usa a média da Dirichlet
+    - amostras: quantas execuções por janela no modo estocástico
+    - seed: semente das amostras
+    - passo_acao, max_weight, lambda_dd, lambda_tc: regras usadas no treino
+    - datas: índice de datas dos dados (opcional, só para o relatório)
+
+    Retorna:
+        DataFrame com uma linha por janela/amostra: retorno acumulado, log-ret,
+        Sharpe, drawdown máximo, turnover e reward total
+    """
+    if modo not in ("deterministico", "estocastico"):
+        raise ValueError("modo deve ser 'deterministico' ou 'estocastico'.")
+    if modo == "deterministico":
+        amostras = 1
+
+    num_steps = len(ret)
+    inicios = janelas_walk_forward(num_steps, tamanho, passo)
+    num_janelas = len(inicios)
+    n = num_janelas * amostras
+
+    envs = PortfolioVecEnv(
+        ret, r_media, v_media, dd, regime_ids, cluster_ids,
+        num_envs=n, inicio_aleatorio=False, episodio_len=tamanho,
+        lambda_dd=lambda_dd, lambda_tc=lambda_tc
+    )
+    kernels = KernelsPortfolio(n, envs.num_assets)
+    novos_pesos = np.empty((n, envs.num_assets))
+
+    r_p = np.empty((tamanho, n))
+    turnover = np.empty((tamanho, n))
+    rewards = np.empty((tamanho, n))
+
+    continua = getattr(policy, "acao_continua", False)
+    generator = torch.Generator().manual_seed(seed)
+    rng = np.random.default_rng(seed)
+    states = envs.reset(inicios=np.repeat(inicios, amostras))
+
+    with torch.no_grad():
+        for k in range(tamanho):
+            saida = policy(torch.from_numpy(states))
+            if continua:
+                alpha = saida.numpy().astype(np.float64)
+                # média da Dirichlet, ou amostra (gammas normalizadas = Dirichlet)
+                alvo = alpha if modo == "deterministico" else rng.gamma(alpha)
+                kernels.projetar_pesos(alvo, max_weight, out=novos_pesos)
+            else:
+                if modo == "deterministico":
+                    actions = saida.argmax(dim=1)
+                else:
+                    probs = torch.softmax(saida, dim=1)
+                    actions = torch.multinomial(probs, 1, generator=generator).squeeze(1)
+                kernels.aplicar_acao(envs.pesos, actions.numpy(), passo_acao, max_weight, out=novos_pesos)
+
+            # retorno puro e turnover do dia, antes do ambiente avançar
+            retornos_dia = envs.ret[envs.t]
+            np.matmul(novos_pesos[:, None, :], retornos_dia[:, :, None], out=r_p[k][:, None, None])
+            np.sum(np.abs(novos_pesos - envs.pesos), axis=1, out=turnover[k])
+
+            states, rewards[k], _ = envs.step(novos_pesos)
+
+    relatorio = pd.DataFrame(_metricas(r_p, turnover, rewards))
+    relatorio.insert(0, "janela", np.repeat(np.arange(num_janelas), amostras))
+    relatorio.insert(1, "amostra", np.tile(np.arange(amostras), num_janelas))
+    relatorio.insert(2, "modo", modo)
+
+    inicio_janela = np.repeat(inicios, amostras)
+    fim_janela = inicio_janela + tamanho - 1
+    if datas is not None:
+        datas = pd.Index(datas)
+        relatorio.insert(3, "inicio", datas[inicio_janela])
+        relatorio.insert(4, "fim", datas[fim_janela])
+    else:
+        relatorio.insert(3, "inicio", inicio_janela)
+        relatorio.insert(4, "fim", fim_janela)
+
+    return relatorio
+
+
+if __name__ == "__main__":
+    import sys
+
+    from teste import (
+        ret_test, r_media_test, v_media_test, dd_test, regime_ids_test,
+        cluster_ids, NUM_ATIVOS
+    )
+
+    caminho = sys.argv[1] if len(sys.argv) > 1 else "policy_ppo_gae.pt"
+    state_dim = NUM_ATIVOS + 3 + NUM_ATIVOS
+    policy = carregar_policy(caminho, state_dim, NUM_ATIVOS * 2)
+
+    dados = (ret_test, r_media_test, v_media_test, dd_test, regime_ids_test, cluster_ids)
+    det = avaliar_janelas(policy, *dados, modo="deterministico", datas=ret_test.index)
+    est = avaliar_janelas(policy, *dados, modo="estocastico", amostras=20, datas=ret_test.index)
+
+    print("\n===== BACKTEST WALK-FORWARD (argmax) =====")
+    print(det.to_string(index=False))
+    print("\n===== BACKTEST WALK-FORWARD (estocástico, média das amostras) =====")
+    print(est.groupby("janela").mean(numeric_only=True).drop(columns="amostra").to_string())
@@ -0,0 +1,125 @@
+import copy
+import os
+import queue
+import tempfile
+import threading
+
+import numpy as np
+import torch
+
+
+def arrays_para_tensores(obj):
+    """
+    Troca (recursivamente) os arrays NumPy por tensores.
+
+    Assim o checkpoint só tem tensores, dicts, listas e números e pode ser
+    lido com torch.load no modo padrão (weights_only), como faz o carregar_policy.
+    """
+    if isinstance(obj, np.ndarray):
+        return torch.from_numpy(obj.copy())
+    if isinstance(obj, dict):
+        return {k: arrays_para_tensores(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(arrays_para_tensores(v) for v in obj)
+    return obj
+
+
+def tensores_para_arrays(obj):
+    """Inverso do arrays_para_tensores."""
+    if isinstance(obj, torch.Tensor):
+        return obj.numpy()
+    if isinstance(obj, dict):
+        return {k: tensores_para_arrays(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(tensores_para_arrays(v) for v in obj)
+    return obj
+
+
+def salvar_atomico(estado, caminho):
+    """
+    torch.save num arquivo temporário da mesma pasta + os.replace.
+
+    Se o processo cair no meio da escrita, o checkpoint anterior continua inteiro.
+    """
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    os.makedirs(pasta, exist_ok=True)
+
+    fd, tmp = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            torch.save(estado, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, caminho)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def carregar_checkpoint(caminho):
+    return torch.load(caminho, map_location="cpu")
+
+
+#? Grava checkpoints numa thread separada para não travar o loop de treino
+class GravadorCheckpoint:
+    def __init__(self, caminho):
+        """
+        - caminho: arquivo do checkpoint (sempre sobrescrito de forma atômica)
+
+        salvar() tira uma cópia do estado na hora (os pesos continuam mudando
+        durante o treino) e a serialização + escrita no disco ficam com a thread.
+        Se chegar um checkpoint novo antes do anterior ser gravado, só o mais
+        recente é escrito.
+        """
+        self.caminho = caminho
+        self._fila = queue.Queue(maxsize=1)
+        self._erro = None
+        self._thread = threading.Thread(target=self._gravar, daemon=True)
+        self._thread.start()
+
+    def _gravar(self):
+        while True:
+            estado = self._fila.get()
+            try:
+                if estado is None:
+                    return
+                salvar_atomico(estado, self.caminho)
+            except Exception as e:
+                self._erro = e
+            finally:
+                self._fila.task_done()
+
+    def _checar_erro(self):
+        if self._erro is not None:
+            erro, self._erro = self._erro, None
+            raise RuntimeError(f"Falha ao gravar o checkpoint {self.caminho}") from erro
+
+    def salvar(self, estado):
+        self._checar_erro()
+        copia = copy.deepcopy(estado)
+
+        # descarta o pendente (ainda não gravado): só interessa o mais novo
+        try:
+            self._fila.get_nowait()
+            self._fila.task_done()
+        except queue.Empty:
+            pass
+        self._fila.put(copia)
+
+    def esperar(self):
+        """Bloqueia até o último checkpoint pedido estar no disco."""
+        self._fila.join()
+        self._checar_erro()
+
+    def fechar(self):
+        if self._thread.is_alive():
+            self._fila.put(None)
+            self._thread.join()
+        self._checar_erro()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
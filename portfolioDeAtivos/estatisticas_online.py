@@ -0,0 +1,201 @@
+import numpy as np
+
+from features import classificar_regime_ids, media_ativos
+
+
+# Tolerância do pandas para "cancelamento catastrófico" na variância móvel
+_INV_COND_TOL = np.finfo(np.float64).eps * 1e3
+
+
+def _welford(nobs, media, ssqdm, comp, x, sinal):
+    """
+    Um passo do Welford com compensação de Kahan (add_var / remove_var do pandas),
+    para todos os ativos de uma vez. sinal=+1 soma x à janela, -1 tira.
+
+    Retorna:
+        media, ssqdm e comp novos e a máscara dos ativos em que a conta ficou instável
+    """
+    ssqdm_ant = ssqdm
+    media_ant = media - comp
+    y = x - comp
+    t = y - media
+    comp = t + media - y
+    media = media + sinal * (t / nobs)
+    ssqdm = ssqdm + sinal * ((x - media_ant) * (x - media))
+    return media, ssqdm, comp, ssqdm_ant * _INV_COND_TOL > ssqdm
+
+
+#? Features de mercado atualizadas barra a barra (uso ao vivo)
+# calcular_features refaz pct_change, rolling std, cumprod e cummax sobre o
+# histórico inteiro. Aqui cada nova barra de preços custa O(NUM_ATIVOS): guardamos
+# só a última cotação, uma janela circular de retornos, as somas da variância
+# móvel, o valor acumulado do "índice global" e o seu pico.
+#
+# A variância móvel segue passo a passo o roll_var do pandas 3 (Welford com
+# compensação de Kahan; tira o valor que sai da janela antes de somar o que
+# entra; se a conta perde precisão, recalcula aquele ativo do zero sobre a
+# janela), e as médias entre ativos usam o mesmo media_ativos do
+# calcular_features. Por isso os resultados são idênticos, bit a bit, aos de
+# calcular_features.
+class EstatisticasIncrementais:
+    def __init__(self, num_assets, janela_vol=30):
+        """
+        - num_assets: quantos ativos (colunas de preço) por barra
+        - janela_vol: janela da volatilidade móvel (mesma do calcular_features)
+        """
+        self.num_assets = num_assets
+        self.janela_vol = janela_vol
+        A = num_assets
+
+        self.barras = 0
+        self.ultimo_preco = np.full(A, np.nan)
+
+        # janela circular com os últimos janela_vol retornos de cada ativo
+        self._janela = np.zeros((janela_vol, A))
+
+        # estado da variância móvel por ativo (mesmas variáveis do roll_var)
+        self._nobs = 0
+        self._media = np.zeros(A)
+        self._ssqdm = np.zeros(A)
+        self._comp_add = np.zeros(A)
+        self._comp_rem = np.zeros(A)
+
+        # "índice global" (média dos ativos): valor acumulado e topo histórico
+        self.valor_indice = 1.0
+        self.pico_indice = np.nan
+
+        self.ret = np.zeros(A)
+        self.vol = np.full(A, np.nan)
+        self.r_media = np.nan
+        self.v_media = np.nan
+        self.dd = np.nan
+        self.regime_id = None
+
+    def _janela_em_ordem(self):
+        """Retornos da janela atual, do mais antigo para o mais novo."""
+        n = min(self.barras + 1, self.janela_vol)
+        inicio = (self.barras + 1 - n) % self.janela_vol
+        return self._janela[(inicio + np.arange(n)) % self.janela_vol]
+
+    def _recalcular(self, ativos):
+        """Refaz do zero a variância dos ativos instáveis (como o roll_var faz)."""
+        media = np.zeros(len(ativos))
+        ssqdm = np.zeros(len(ativos))
+        comp = np.zeros(len(ativos))
+        for nobs, linha in enumerate(self._janela_em_ordem()[:, ativos], start=1):
+            media, ssqdm, comp, _ = _welford(nobs, media, ssqdm, comp, linha, +1)
+
+        self._media[ativos] = media
+        self._ssqdm[ativos] = ssqdm
+        self._comp_add[ativos] = comp
+        self._comp_rem[ativos] = 0.0
+
+    def _atualizar_variancia(self, ret):
+        """Sai o retorno mais antigo da janela, entra o novo; devolve o desvio padrão."""
+        pos = self.barras % self.janela_vol
+        instavel = np.zeros(self.num_assets, dtype=bool)
+
+        if self.barras >= self.janela_vol:
+            self._nobs -= 1
+            if self._nobs == 0:
+                self._media[:] = 0.0
+                self._ssqdm[:] = 0.0
+            else:
+                self._media, self._ssqdm, self._comp_rem, instavel = _welford(
+                    self._nobs, self._media, self._ssqdm, self._comp_rem, self._janela[pos], -1
+                )
+
+        self._janela[pos] = ret
+        self._nobs += 1
+        self._media, self._ssqdm, self._comp_add, instavel_add = _welford(
+            self._nobs, self._media, self._ssqdm, self._comp_add, ret, +1
+        )
+        instavel |= instavel_add
+
+        if instavel.any():
+            self._recalcular(np.flatnonzero(instavel))
+
+        # calc_var (ddof=1) + zsqrt, que zera variâncias negativas
+        if self._nobs <= 1:
+            return np.full(self.num_assets, np.nan)
+        var = self._ssqdm / (self._nobs - 1)
+        return np.sqrt(np.maximum(var, 0.0))
+
+    def atualizar(self, precos):
+        """
+        Recebe os preços de uma nova barra (NaN = ativo sem cotação no dia).
+
+        Retorna:
+            dict com ret, vol (por ativo), r_media, v_media, dd e regime_id da
+            barra, os mesmos valores da última linha de calcular_features
+        """
+        precos = np.asarray(precos, dtype=np.float64)
+        if precos.shape != (self.num_assets,):
+            raise ValueError(f"Esperava {self.num_assets} preços, recebi {precos.shape}.")
+
+        # pct_change(fill_method=None).fillna(0): sem cotação hoje ou ontem = retorno 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ret = precos / self.ultimo_preco - 1
+        ret[np.isnan(ret)] = 0.0
+        self.ultimo_preco = precos
+
+        # volatilidade móvel da janela
+        vol = self._atualizar_variancia(ret) * np.sqrt(252)
+
+        # médias entre ativos: mesma função (e mesma ordem de soma) do calcular_features
+        r_media = media_ativos(ret)
+        v_media = media_ativos(vol)
+
+        # drawdown do índice global: cumprod + cummax incrementais
+        self.valor_indice = self.valor_indice * (1 + r_media)
+        if not self.pico_indice >= self.valor_indice:
+            self.pico_indice = self.valor_indice
+        dd = (self.valor_indice - self.pico_indice) / self.pico_indice
+
+        self.barras += 1
+        self.ret, self.vol = ret, vol
+        self.r_media, self.v_media, self.dd = float(r_media), float(v_media), float(dd)
+        self.regime_id = int(classificar_regime_ids([r_media], [v_media], [dd])[0])
+
+        return {
+            "ret": ret,
+            "vol": vol,
+            "r_media": self.r_media,
+            "v_media": self.v_media,
+            "dd": self.dd,
+            "regime_id": self.regime_id,
+        }
+
+    def aquecer(self, precos):
+        """
+        Passa um histórico inteiro (DataFrame ou array [dias, ativos]) pelo atualizar.
+
+        Retorna:
+            dict de arrays com ret, vol, r_media, v_media, dd e regime_ids,
+            comparáveis linha a linha com calcular_features
+        """
+        valores = precos.to_numpy(dtype=np.float64) if hasattr(precos, "to_numpy") else np.asarray(precos)
+        linhas = [self.atualizar(linha) for linha in valores]
+        return {
+            "ret": np.array([l["ret"] for l in linhas]),
+            "vol": np.array([l["vol"] for l in linhas]),
+            "r_media": np.array([l["r_media"] for l in linhas]),
+            "v_media": np.array([l["v_media"] for l in linhas]),
+            "dd": np.array([l["dd"] for l in linhas]),
+            "regime_ids": np.array([l["regime_id"] for l in linhas], dtype=np.int64),
+        }
+
+    def observacao(self, pesos, cluster_ids):
+        """
+        Vetor de estado para a política, igual ao do PortfolioEnv: o robô vê
+        as features da última barra fechada.
+
+        Retorna:
+            array float32 [pesos, r_media, v_media, dd, clusters]
+        """
+        estado = np.concatenate([
+            np.asarray(pesos, dtype=np.float64),
+            [self.r_media, self.v_media, self.dd],
+            np.asarray(cluster_ids, dtype=np.float64),
+        ]).astype(np.float32)
+        return np.nan_to_num(estado, nan=0.0, posinf=0.0, neginf=0.0)
@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# Mude este número sempre que a lógica de alguma feature mudar:
+# o cache antigo deixa de valer automaticamente, e checkpoints/políticas
+# treinados com outra versão são recusados (checar_versao_features).
+# v2: pct_change sem ffill dos preços (ver README) e médias entre ativos em ordem fixa
+VERSAO_FEATURES = 2
+
+PASTA_CACHE = ".cache_features"
+
+REGIME_MAP = {
+    "bull": 0,
+    "bear": 1,
+    "alta_vol": 2,
+    "baixa_vol": 3,
+    "neutro": 4
+}
+NOMES_REGIME = np.array(list(REGIME_MAP))
+
+ARRAYS_FEATURES = ("ret", "vol", "r_media", "v_media", "dd", "regime_ids", "cluster_ids", "datas")
+
+
+def checar_versao_features(versao, origem):
+    """
+    Erro se `origem` (checkpoint, política exportada) foi treinada com features
+    de outra versão: a rede veria entradas diferentes das do treino.
+
+    - versao: VERSAO_FEATURES gravada junto dos pesos (None = arquivo anterior à v2)
+    """
+    if versao != VERSAO_FEATURES:
+        gravada = "sem versão (v1)" if versao is None else f"v{versao}"
+        raise ValueError(
+            f"{origem} foi treinado com features {gravada}, as atuais são v{VERSAO_FEATURES}. "
+            "Treine de novo com as features atuais."
+        )
+
+
+def calcular_retornos(precos):
+    # pct_change() calcula a variação percentual entre cada linha e a anterior (100 -> 105 = 0.05)
+    # fillna(0) troca os valores ausentes (primeiro dia, ativo sem cotação) por 0
+    # fill_method=None deixa explícito o padrão do pandas 3 (sem ffill dos preços):
+    # o resultado não muda com a versão e a EstatisticasIncrementais reproduz igual.
+    # No pandas 2 isso muda as features de antes (o padrão lá era ffill): ver README
+    return precos.pct_change(fill_method=None).fillna(0)
+
+
+def calcular_volatilidade(retornos, janela=30):
+    # desvio padrão numa janela móvel de `janela` dias, anualizado com raiz de 252 pregões
+    return retornos.rolling(janela, min_periods=1).std() * np.sqrt(252)
+
+
+def calcular_drawdown(series):
+    """
+    Calcula o drawdown usando retornos diários.
+
+    - (1 + series).cumprod(): transforma retornos em valor acumulado.
+    - cummax(): descobre o topo histórico a cada dia.
+    - drawdown = diferença percentual entre valor atual e topo histórico.
+    """
+    cumulative = (1 + series).cumprod()
+    max_cum = cumulative.cummax()
+    return (cumulative - max_cum) / max_cum
+
+
+def media_ativos(valores):
+    """
+    Média de cada linha ignorando NaN (linha toda NaN -> NaN).
+
+    - valores: array [dias, ativos] ou [ativos] (uma barra só)
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    validos = ~np.isnan(valores)
+    # cumsum soma sempre em sequência, seja uma barra [ativos] ou a tabela inteira
+    # (o sum do NumPy muda a ordem da soma conforme o formato do array)
+    soma = np.cumsum(np.where(validos, valores, 0.0), axis=-1)[..., -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return soma / validos.sum(axis=-1)
+
+
+def classificar_regime_ids(retornos, volatilidade, drawdown):
+    """
+    Mesmas regras do classificar_regime, só que vetorizado com np.select.
+
+    A ordem das condições importa: a primeira que for verdadeira vence,
+    exatamente como o if/elif original.
+
+    Retorna:
+        array de inteiros (ids do REGIME_MAP)
+    """
+    r = np.asarray(retornos, dtype=np.float64)
+    v = np.asarray(volatilidade, dtype=np.float64)
+    d = np.asarray(drawdown, dtype=np.float64)
+
+    condicoes = [
+        d < -0.20,                   # bear
+        (r > 0.003) & (d > -0.05),   # bull
+        v > 0.25,                    # alta_vol
+        v < 0.10,                    # baixa_vol
+    ]
+    escolhas = [
+        REGIME_MAP["bear"],
+        REGIME_MAP["bull"],
+        REGIME_MAP["alta_vol"],
+        REGIME_MAP["baixa_vol"],
+    ]
+    return np.select(condicoes, escolhas, default=REGIME_MAP["neutro"]).astype(np.int64)
+
+
+def classificar_regime(retornos, volatilidade, drawdown):
+    """
+    Classifica o regime de mercado com regras simples.
+    bull = touro, mercado otimista / bear = urso, mercado pessimista.
+
+    Retorna:
+        lista com o nome do regime de cada dia
+    """
+    return NOMES_REGIME[classificar_regime_ids(retornos, volatilidade, drawdown)].tolist()
+
+
+def calcular_features(precos, janela_vol=30, clusters=None):
+    """
+    Calcula todas as features de mercado a partir da tabela de preços.
+
+    - precos: DataFrame [dias, ativos]
+    - janela_vol: janela da volatilidade móvel
+    - clusters: dict ticker -> cluster (opcional)
+
+    Retorna:
+        dict de arrays NumPy: ret, vol, r_media, v_media, dd, regime_ids,
+        cluster_ids e datas
+    """
+    ret = calcular_retornos(precos)
+    vol = calcular_volatilidade(ret, janela=janela_vol)
+
+    ret_np = ret.to_numpy(dtype=np.float64)
+    vol_np = vol.to_numpy(dtype=np.float64)
+
+    # médias entre ativos em NumPy (linha a linha, ignorando NaN como o mean do pandas):
+    # a ordem da soma fica fixa e a EstatisticasIncrementais chega no mesmo valor
+    r_media = pd.Series(media_ativos(ret_np), index=ret.index)   # retorno médio diário do mercado
+    v_media = pd.Series(media_ativos(vol_np), index=vol.index)   # volatilidade média
+    dd = calcular_drawdown(r_media)  # drawdown do "índice global" (média dos ativos)
+
+    if clusters is None:
+        cluster_ids = np.zeros(0, dtype=np.int64)
+    else:
+        cluster_ids = np.array([clusters[t] for t in precos.columns], dtype=np.int64)
+
+    return {
+        "ret": ret_np,
+        "vol": vol_np,
+        "r_media": r_media.to_numpy(dtype=np.float64),
+        "v_media": v_media.to_numpy(dtype=np.float64),
+        "dd": dd.to_numpy(dtype=np.float64),
+        "regime_ids": classificar_regime_ids(r_media.values, v_media.values, dd.values),
+        "cluster_ids": cluster_ids,
+        "datas": precos.index.to_numpy(dtype="datetime64[ns]"),
+    }
+
+
+def _hash_precos(fonte):
+    """Hash do conteúdo dos preços: bytes do CSV ou hash do DataFrame."""
+    h = hashlib.sha256()
+    if isinstance(fonte, pd.DataFrame):
+        h.update(pd.util.hash_pandas_object(fonte, index=True).to_numpy().tobytes())
+        h.update("|".join(map(str, fonte.columns)).encode())
+    else:
+        with open(fonte, "rb") as f:
+            for bloco in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloco)
+    return h.hexdigest()
+
+
+def chave_cache(fonte, janela_vol=30, clusters=None):
+    """Chave do artefato: versão + hash dos preços + parâmetros das janelas."""
+    parametros = {
+        "versao": VERSAO_FEATURES,
+        "precos": _hash_precos(fonte),
+        "janela_vol": janela_vol,
+        "clusters": clusters,
+        # o pct_change muda de comportamento entre versões do pandas
+        "pandas": pd.__version__,
+    }
+    bruto = json.dumps(parametros, sort_keys=True).encode()
+    return f"v{VERSAO_FEATURES}-{hashlib.sha256(bruto).hexdigest()[:16]}"
+
+
+def _salvar_cache(pasta, features, meta):
+    """Grava cada array em .npy numa pasta temporária e renomeia no fim (atômico)."""
+    tmp = f"{pasta}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    for nome in ARRAYS_FEATURES:
+        np.save(os.path.join(tmp, f"{nome}.npy"), features[nome])
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    try:
+        os.replace(tmp, pasta)
+    except OSError:
+        # outro processo gravou o mesmo artefato antes: fica o dele
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _ler_cache(pasta):
+    """Abre os arrays com mmap: nada é lido do disco até ser usado."""
+    features = {
+        nome: np.load(os.path.join(pasta, f"{nome}.npy"), mmap_mode="r")
+        for nome in ARRAYS_FEATURES
+    }
+    with open(os.path.join(pasta, "meta.json"), encoding="utf-8") as f:
+        features["meta"] = json.load(f)
+    return features
+
+
+def carregar_features(fonte, janela_vol=30, clusters=None, pasta_cache=PASTA_CACHE, forcar=False):
+    """
+    Devolve as features de mercado, usando o cache em disco quando possível.
+
+    - fonte: caminho do CSV de preços ou o próprio DataFrame de preços
+    - janela_vol: janela da volatilidade móvel
+    - clusters: dict ticker -> cluster (opcional)
+    - pasta_cache: onde ficam os artefatos versionados
+    - forcar: ignora o cache e recalcula
+
+    Retorna:
+        dict com os arrays de calcular_features (abertos com mmap quando vêm
+        do cache) e "meta" com tickers, janela e chave do artefato
+    """
+    chave = chave_cache(fonte, janela_vol, clusters)
+    pasta = os.path.join(pasta_cache, chave)
+
+    if not forcar and os.path.exists(os.path.join(pasta, "meta.json")):
+        return _ler_cache(pasta)
+
+    if isinstance(fonte, pd.DataFrame):
+        precos = fonte
+    else:
+        precos = pd.read_csv(fonte, index_col=0, parse_dates=True)
+
+    features = calcular_features(precos, janela_vol=janela_vol, clusters=clusters)
+    meta = {
+        "chave": chave,
+        "versao": VERSAO_FEATURES,
+        "janela_vol": janela_vol,
+        "tickers": [str(t) for t in precos.columns],
+    }
+
+    os.makedirs(pasta_cache, exist_ok=True)
+    if forcar:
+        shutil.rmtree(pasta, ignore_errors=True)
+    _salvar_cache(pasta, features, meta)
+
+    features["meta"] = meta
+    return features
@@ -0,0 +1,146 @@
+# Inferência da PolicyMLP / ValueMLP só com NumPy (sem importar torch).
+# O torch só é carregado dentro de exportar_npz, que roda uma vez depois do treino.
+import numpy as np
+
+
+def exportar_npz(caminho, policy=None, value=None):
+    """
+    Salva os pesos das redes treinadas num .npz simples.
+
+    As chaves seguem o state_dict com o nome da rede na frente
+    ("policy/net.0.weight", "value/net.4.bias", ...); "versao_features" guarda
+    a VERSAO_FEATURES do treino, conferida no MLPNumpy.carregar.
+
+    - policy: PolicyMLP (ou o state_dict dela)
+    - value: ValueMLP (ou o state_dict dela), opcional
+    """
+    import torch
+
+    from features import VERSAO_FEATURES
+
+    arrays = {}
+    for nome, rede in (("policy", policy), ("value", value)):
+        if rede is None:
+            continue
+        estado = rede.state_dict() if isinstance(rede, torch.nn.Module) else rede
+        for chave, tensor in estado.items():
+            arrays[f"{nome}/{chave}"] = tensor.detach().cpu().numpy().astype(np.float32)
+
+    if not arrays:
+        raise ValueError("Nada para exportar: passe policy e/ou value.")
+    arrays["versao_features"] = np.array(VERSAO_FEATURES)
+    np.savez(caminho, **arrays)
+
+
+#? MLP (Linear -> ReLU -> ... -> Linear) avaliada em lote com NumPy
+class MLPNumpy:
+    def __init__(self, pesos, vieses):
+        """
+        - pesos: lista de matrizes no formato do nn.Linear ([saída, entrada])
+        - vieses: lista de vetores [saída]
+
+        ReLU entre as camadas e nenhuma ativação na última, igual ao nn.Sequential
+        da PolicyMLP e da ValueMLP.
+        """
+        if len(pesos) != len(vieses) or not pesos:
+            raise ValueError("pesos e vieses precisam ter o mesmo número (> 0) de camadas.")
+
+        # guardadas já transpostas ([entrada, saída]) para o x @ W do forward
+        self.pesos = [np.ascontiguousarray(np.asarray(W, dtype=np.float32).T) for W in pesos]
+        self.vieses = [np.asarray(b, dtype=np.float32) for b in vieses]
+        self.state_dim = self.pesos[0].shape[0]
+        self.saida_dim = self.pesos[-1].shape[1]
+
+    @classmethod
+    def carregar(cls, caminho, rede="policy"):
+        """
+        Lê do .npz do exportar_npz as camadas de uma rede ("policy" ou "value").
+        """
+        from features import checar_versao_features
+
+        with np.load(caminho) as dados:
+            versao = int(dados["versao_features"]) if "versao_features" in dados.files else None
+            checar_versao_features(versao, caminho)
+            prefixo = f"{rede}/"
+            camadas = {}
+            for chave in dados.files:
+                if not chave.startswith(prefixo):
+                    continue
+                # "net.2.weight" -> camada 2, "weight"
+                *_, indice, tipo = chave[len(prefixo):].split(".")
+                camadas.setdefault(int(indice), {})[tipo] = dados[chave]
+
+        if not camadas:
+            raise KeyError(f"Rede '{rede}' não encontrada em {caminho}.")
+
+        ordem = sorted(camadas)
+        return cls([camadas[i]["weight"] for i in ordem], [camadas[i]["bias"] for i in ordem])
+
+    def forward(self, states):
+        """
+        - states: [state_dim] ou [N, state_dim]
+
+        Retorna:
+            saída da última camada ([N, saida_dim]; [saida_dim] se veio um estado só)
+        """
+        x = np.asarray(states, dtype=np.float32)
+        um_estado = x.ndim == 1
+        if um_estado:
+            x = x[None, :]
+
+        ultima = len(self.pesos) - 1
+        for i, (W, b) in enumerate(zip(self.pesos, self.vieses)):
+            x = x @ W
+            x += b
+            if i < ultima:
+                np.maximum(x, 0.0, out=x)
+
+        return x[0] if um_estado else x
+
+    __call__ = forward
+
+
+class PolicyNumpy(MLPNumpy):
+    """PolicyMLP sem torch: logits, probabilidades e ação argmax para produção."""
+
+    @classmethod
+    def carregar(cls, caminho, rede="policy"):
+        return super().carregar(caminho, rede)
+
+    def probabilidades(self, states):
+        logits = self.forward(states)
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        np.exp(logits, out=logits)
+        logits /= logits.sum(axis=-1, keepdims=True)
+        return logits
+
+    def agir(self, states):
+        """Ação determinística (argmax dos logits) de cada estado."""
+        return self.forward(states).argmax(axis=-1)
+
+
+class ValueNumpy(MLPNumpy):
+    """ValueMLP sem torch: V(s) de cada estado."""
+
+    @classmethod
+    def carregar(cls, caminho, rede="value"):
+        return super().carregar(caminho, rede)
+
+    def forward(self, states):
+        return super().forward(states)[..., 0]
+
+    __call__ = forward
+
+
+if __name__ == "__main__":
+    import sys
+
+    from backtest import carregar_policy
+    from teste import NUM_ATIVOS
+
+    origem = sys.argv[1] if len(sys.argv) > 1 else "policy_ppo_gae.pt"
+    destino = sys.argv[2] if len(sys.argv) > 2 else "policy_ppo_gae.npz"
+
+    state_dim = NUM_ATIVOS + 3 + NUM_ATIVOS
+    exportar_npz(destino, policy=carregar_policy(origem, state_dim, NUM_ATIVOS * 2))
+    print(f"Pesos exportados para {destino}")
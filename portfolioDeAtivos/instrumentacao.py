@@ -0,0 +1,95 @@
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+_SEM_MEDICAO = nullcontext()
+
+
+#? Cronômetros e contadores leves para o loop de treino
+class Perfilador:
+    def __init__(self, caminho_jsonl=None):
+        """
+        - caminho_jsonl: arquivo onde cada registrar() acrescenta uma linha JSON
+          (None = só devolve o dict, sem gravar)
+        """
+        self.caminho_jsonl = caminho_jsonl
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Zera tempos e contadores e recomeça o relógio do período."""
+        self.tempos = defaultdict(float)     # segundos acumulados por fase
+        self.chamadas = defaultdict(int)     # quantas vezes cada fase rodou
+        self.contadores = defaultdict(int)   # passos, epochs, episódios...
+        self._inicio = time.perf_counter()
+
+    @contextmanager
+    def fase(self, nome):
+        """Mede o tempo do bloco: with perfil.fase("env"): ..."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tempos[nome] += time.perf_counter() - t0
+            self.chamadas[nome] += 1
+
+    def contar(self, nome, n=1):
+        self.contadores[nome] += n
+
+    def registrar(self, **extra):
+        """
+        Fecha o período atual (normalmente uma iteração do PPO) e zera tudo.
+
+        Retorna:
+            dict com tempo total, passos/s, tempo de update por epoch,
+            tempo e porcentagem de cada fase, contadores e o que vier em extra
+        """
+        total = time.perf_counter() - self._inicio
+        passos = self.contadores.get("passos_env", 0)
+        epochs = self.contadores.get("epochs", 0)
+
+        registro = dict(extra)
+        registro["tempo_total"] = total
+        registro["passos_por_seg"] = passos / total if total > 0 else 0.0
+        registro["update_por_epoch"] = self.tempos.get("update", 0.0) / epochs if epochs else 0.0
+        registro["fases"] = {
+            nome: {
+                "segundos": segundos,
+                "chamadas": self.chamadas[nome],
+                "porcentagem": 100.0 * segundos / total if total > 0 else 0.0,
+            }
+            for nome, segundos in sorted(self.tempos.items(), key=lambda item: -item[1])
+        }
+        registro["contadores"] = dict(self.contadores)
+
+        if self.caminho_jsonl is not None:
+            with open(self.caminho_jsonl, "a", encoding="utf-8") as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+        self.reiniciar()
+        return registro
+
+
+class PerfiladorNulo:
+    """Mesmo contrato do Perfilador, sem medir nada (padrão quando ninguém pede perfil)."""
+
+    def reiniciar(self):
+        pass
+
+    def fase(self, nome):
+        return _SEM_MEDICAO
+
+    def contar(self, nome, n=1):
+        pass
+
+    def registrar(self, **extra):
+        return dict(extra)
+
+
+def resumo(registro):
+    """Linha curta para o print do loop de treino."""
+    fases = " | ".join(
+        f"{nome}={info['porcentagem']:.0f}%" for nome, info in registro["fases"].items()
+    )
+    return (f"[PERF] {registro['passos_por_seg']:.0f} passos/s | "
+            f"update/epoch={registro['update_por_epoch'] * 1000:.1f}ms | {fases}")
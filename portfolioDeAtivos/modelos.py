@@ -0,0 +1,65 @@
+# As redes ficam aqui (e não no rl_env) para poderem ser importadas sem carregar
+# os dados do teste.py, por exemplo dentro dos processos de coleta em paralelo.
+
+#saida = x * W + b
+# ativação relu = max(0, saida) Ela zera valores negativos e deixa positivos como estão.
+import torch.nn as nn
+import torch.nn.functional as F
+
+# Isso cria uma rede neural personalizada herdando de nn.Module
+class PolicyMLP(nn.Module):
+# state_dim é o tamanho do vetor de entrada (dimensão do estado). num_actions é quantas ações o agente pode tomar
+    def __init__(self, state_dim, num_actions):
+# O super() só registra o módulo na infraestrutura do PyTorch
+        super().__init__()
+        self.net = nn.Sequential(
+# na camada linear: estado → 128 neurônios.Primeiro parametro é entrada e a segunda é quantidade de neuronios
+            nn.Linear(state_dim, 128), 
+# ReLU como ativação           
+            nn.ReLU(),
+            nn.Linear(128, 128),
+            nn.ReLU(),
+            nn.Linear(128, num_actions)
+        )
+#A entrada x passa pela rede e vira logits.Logits são valores crus, sem normalização
+    def forward(self, x):
+        logits = self.net(x)
+# softmax converte isso numa distribuição de probabilidade sobre as ações (cada linha soma 1).dim=1 significa: aplicar softmax ao longo das colunas, isto é, entre ações.
+        return logits
+    
+# Qual bom ele está nessse estado ? 
+class ValueMLP(nn.Module):
+    def __init__(self, state_dim):
+        super().__init__()
+        self.net = nn.Sequential(
+            nn.Linear(state_dim, 128),
+            nn.ReLU(),
+            nn.Linear(128, 64),
+            nn.ReLU(),
+            nn.Linear(64, 1)
+        )
+
+    def forward(self, x):
+        return self.net(x)
+
+
+# Modo de ação contínua: em vez de empurrar um ativo por vez, a rede devolve a
+# carteira inteira. A saída são as concentrações de uma Dirichlet (uma por ativo),
+# então toda amostra já é long-only e soma 1; o cap fica por conta do ambiente.
+class PolicyDirichlet(nn.Module):
+    acao_continua = True
+
+    def __init__(self, state_dim, num_assets):
+        super().__init__()
+        self.num_assets = num_assets
+        self.net = nn.Sequential(
+            nn.Linear(state_dim, 128),
+            nn.ReLU(),
+            nn.Linear(128, 128),
+            nn.ReLU(),
+            nn.Linear(128, num_assets)
+        )
+
+    def forward(self, x):
+# concentração >= 1: a distribuição não joga massa nos cantos do simplex (pesos = 0 exatos dão log_prob -inf)
+        return 1.0 + F.softplus(self.net(x))
@@ -0,0 +1,206 @@
+import numpy as np
+
+
+#? Versões "em lote" de aplicar_acao_portfolio e calcular_recompensa_portfolio
+# As funções do teste.py trabalham com UMA carteira por chamada. Aqui cada linha
+# das matrizes é uma carteira diferente, e todo o trabalho é feito em buffers
+# pré-alocados, então o loop de treino não cria arrays novos a cada passo.
+# aplicar_acao/projetar_pesos dão exatamente o resultado das funções escalares; na
+# recompensa o produto pesos·retornos em lote soma os termos em outra ordem que o
+# np.dot, então pode diferir no último bit (~1e-16, sempre dentro de 1e-15).
+class KernelsPortfolio:
+    def __init__(self, num_envs, num_assets):
+        """
+        - num_envs: quantas carteiras (linhas) por chamada
+        - num_assets: quantos ativos (colunas) por carteira
+        """
+        self.num_envs = num_envs
+        self.num_assets = num_assets
+
+        self._linhas = np.arange(num_envs)
+        self._idx = np.empty(num_envs, dtype=np.int64)
+        self._direcao = np.empty(num_envs, dtype=np.int64)
+        self._soma = np.empty(num_envs)
+        self._mask = np.empty(num_envs, dtype=bool)
+        self._mask_inv = np.empty(num_envs, dtype=bool)
+        self._delta = np.empty(num_envs)
+        self._tmp = np.empty((num_envs, num_assets))
+        self._acima = np.empty((num_envs, num_assets), dtype=bool)
+
+        self._r_p = np.empty(num_envs)
+        self._log_ret = np.empty(num_envs)
+        self._penal_dd = np.empty(num_envs)
+        self._turnover = np.empty(num_envs)
+
+    def _normalizar(self, pesos):
+        """Divide cada linha pela soma; linhas zeradas voltam para equal-weight."""
+        np.sum(pesos, axis=1, out=self._soma)
+        np.equal(self._soma, 0, out=self._mask)
+        if self._mask.any():
+            pesos[self._mask] = 1.0 / self.num_assets
+            self._soma[self._mask] = 1.0
+        pesos /= self._soma[:, None]
+
+    def aplicar_acao(self, pesos, actions, passo=0.02, max_weight=0.2, out=None):
+        """
+        Mesmo que aplicar_acao_portfolio, para N carteiras de uma vez.
+
+        - pesos: array [N, NUM_ATIVOS] com as alocações atuais
+        - actions: array [N] de inteiros em [0, NUM_ATIVOS * 2)
+        - passo, max_weight: iguais aos da função escalar
+        - out: array [N, NUM_ATIVOS] onde gravar o resultado
+          (pode ser o próprio pesos para atualizar no lugar)
+
+        Retorna:
+            out com os novos pesos (long-only, normalizados, com cap)
+        """
+        if out is None:
+            out = np.empty_like(pesos, dtype=np.float64)
+        if out is not pesos:
+            out[:] = pesos
+
+        np.remainder(actions, self.num_assets, out=self._idx)
+        np.floor_divide(actions, self.num_assets, out=self._direcao)  # 0 = aumenta, 1 = diminui
+
+        # += passo ou -= passo só no ativo escolhido de cada linha
+        self._delta.fill(passo)
+        np.not_equal(self._direcao, 0, out=self._mask)
+        np.copyto(self._delta, -passo, where=self._mask)
+        out[self._linhas, self._idx] += self._delta
+
+        return self.projetar_pesos(out, max_weight, out=out)
+
+    def projetar_pesos(self, alvo, max_weight=0.2, out=None):
+        """
+        Aplica num vetor de pesos qualquer as mesmas regras do aplicar_acao_portfolio:
+        long-only, normalizado e com cap por ativo (projeção no simplex com teto).
+
+        Usado no modo de ação contínua, em que a política já devolve a alocação inteira.
+
+        - alvo: array [N, NUM_ATIVOS] com as alocações pedidas
+        - max_weight: teto por ativo; se max_weight * NUM_ATIVOS < 1 o teto é
+          impossível e o resultado é equal-weight
+        - out: array [N, NUM_ATIVOS] onde gravar (pode ser o próprio alvo)
+        """
+        if out is None:
+            out = np.empty_like(alvo, dtype=np.float64)
+        if out is not alvo:
+            out[:] = alvo
+
+        # impede pesos negativos e normaliza
+        np.clip(out, 0.0, None, out=out)
+        self._normalizar(out)
+
+        # cap por ativo: prende no teto quem passou e redistribui a sobra entre os
+        # outros, proporcional ao peso de cada um (ou igual, se os outros estão
+        # zerados). Cada volta prende pelo menos mais um ativo, então no máximo
+        # NUM_ATIVOS voltas; só as linhas que passam do teto são tocadas.
+        teto = max(max_weight, 1.0 / self.num_assets)
+        for _ in range(self.num_assets):
+            np.greater(out, teto, out=self._acima)
+            np.any(self._acima, axis=1, out=self._mask)
+            if not self._mask.any():
+                break
+
+            linhas = out[self._mask]
+            presos = linhas >= teto
+            livres = ~presos
+            restante = 1.0 - teto * presos.sum(axis=1)
+            soma_livres = np.where(presos, 0.0, linhas).sum(axis=1)
+
+            vazias = soma_livres == 0
+            fator = np.divide(restante, soma_livres, out=np.zeros_like(restante), where=~vazias)
+            linhas *= fator[:, None]
+            if vazias.any():
+                parte = restante[vazias] / np.maximum(livres[vazias].sum(axis=1), 1)
+                linhas[vazias] = np.where(livres[vazias], parte[:, None], 0.0)
+            linhas[presos] = teto
+            out[self._mask] = linhas
+
+        return out
+
+    def recompensa(
+        self,
+        pesos_antigos,
+        pesos_novos,
+        retornos_dia,
+        drawdown_dia,
+        lambda_dd=0.2,
+        lambda_tc=0.001,
+        out=None,
+        r_p=None
+    ):
+        """
+        Mesmo que calcular_recompensa_portfolio, para N carteiras de uma vez.
+
+        - pesos_antigos, pesos_novos: arrays [N, NUM_ATIVOS]
+        - retornos_dia: array [N, NUM_ATIVOS] (cada carteira pode estar num dia diferente)
+        - drawdown_dia: array [N] (ou escalar) com o drawdown de cada carteira
+        - lambda_dd, lambda_tc: iguais aos da função escalar
+        - out: array [N] onde gravar as recompensas
+        - r_p: retorno do portfólio [N] já calculado (ex.: pelo step do ambiente);
+          None = calcula aqui a partir de pesos_novos e retornos_dia
+
+        Retorna:
+            out com as recompensas [N]
+        """
+        if out is None:
+            out = np.empty(self.num_envs)
+
+        # 1) Retorno do portfólio: [N,1,A] @ [N,A,1] (o np.dot de cada linha, a menos de ~1e-16)
+        if r_p is None:
+            np.matmul(pesos_novos[:, None, :], retornos_dia[:, :, None], out=self._r_p[:, None, None])
+            self._r_p += 1
+        else:
+            np.add(r_p, 1, out=self._r_p)
+
+        # log(1 + r_p), com a mesma punição de -10 quando a carteira "quebra"
+        np.less_equal(self._r_p, 0, out=self._mask)
+        np.logical_not(self._mask, out=self._mask_inv)
+        np.log(self._r_p, out=self._log_ret, where=self._mask_inv)
+        np.copyto(self._log_ret, -10.0, where=self._mask)
+
+        # 2) Penalidade de drawdown (só quando negativo)
+        np.square(drawdown_dia, out=self._penal_dd)
+        self._penal_dd *= lambda_dd
+        np.less(drawdown_dia, 0, out=self._mask)
+        np.logical_not(self._mask, out=self._mask_inv)
+        np.copyto(self._penal_dd, 0.0, where=self._mask_inv)
+
+        # 3) Custo de transação (turnover L1)
+        np.subtract(pesos_novos, pesos_antigos, out=self._tmp)
+        np.abs(self._tmp, out=self._tmp)
+        np.sum(self._tmp, axis=1, out=self._turnover)
+        self._turnover *= lambda_tc
+
+        np.subtract(self._log_ret, self._penal_dd, out=out)
+        out -= self._turnover
+        return out
+
+
+def aplicar_acao_portfolio_lote(pesos, actions, passo=0.02, max_weight=0.2, out=None):
+    """Atalho para KernelsPortfolio.aplicar_acao (cria os buffers a cada chamada)."""
+    kernels = KernelsPortfolio(*np.shape(pesos))
+    return kernels.aplicar_acao(pesos, np.asarray(actions), passo, max_weight, out)
+
+
+def projetar_pesos_portfolio_lote(alvo, max_weight=0.2, out=None):
+    """Atalho para KernelsPortfolio.projetar_pesos (cria os buffers a cada chamada)."""
+    kernels = KernelsPortfolio(*np.shape(alvo))
+    return kernels.projetar_pesos(np.asarray(alvo, dtype=np.float64), max_weight, out)
+
+
+def calcular_recompensa_portfolio_lote(
+    pesos_antigos,
+    pesos_novos,
+    retornos_dia,
+    drawdown_dia,
+    lambda_dd=0.2,
+    lambda_tc=0.001,
+    out=None
+):
+    """Atalho para KernelsPortfolio.recompensa (cria os buffers a cada chamada)."""
+    kernels = KernelsPortfolio(*np.shape(pesos_novos))
+    return kernels.recompensa(
+        pesos_antigos, pesos_novos, retornos_dia, drawdown_dia, lambda_dd, lambda_tc, out
+    )
@@ -0,0 +1,171 @@
+import sqlite3
+from datetime import date
+
+import pandas as pd
+
+NOME_BANCO = "precos_historicos.sqlite"
+
+
+#? Fonte padrão: Yahoo Finance
+class FonteYahoo:
+    """
+    Baixa o fechamento ajustado de UM ticker no Yahoo Finance.
+
+    Qualquer objeto com o método baixar(ticker, inicio, fim) devolvendo uma
+    Series (índice = datas, valores = preço) pode substituir esta classe,
+    por exemplo uma fonte falsa com dados locais nos testes.
+    """
+
+    def __init__(self, intervalo="1d"):
+        self.intervalo = intervalo
+
+    def baixar(self, ticker, inicio, fim=None):
+        # import aqui dentro: quem só lê o banco local não precisa do yfinance
+        import yfinance as yf
+
+        dados = yf.download(
+            ticker,
+            start=inicio,
+            end=fim,
+            interval=self.intervalo,
+            auto_adjust=True,
+            progress=False
+        )
+        if dados.empty:
+            return pd.Series(dtype=float)
+
+        # Tratamento para MultiIndex (igual ao baixar_dados original)
+        if isinstance(dados.columns, pd.MultiIndex):
+            if "Adj Close" in dados.columns.levels[0]:
+                dados = dados["Adj Close"]
+            elif "Close" in dados.columns.levels[0]:
+                dados = dados["Close"]
+            else:
+                raise ValueError("Não encontrei 'Adj Close' nem 'Close'.")
+            serie = dados[ticker] if ticker in dados.columns else dados.iloc[:, 0]
+        else:
+            serie = dados["Adj Close"] if "Adj Close" in dados.columns else dados["Close"]
+
+        return serie.dropna()
+
+
+#? Banco local de preços: só baixa o que falta de cada ticker
+class ArmazemPrecos:
+    def __init__(self, caminho=NOME_BANCO, fonte=None):
+        """
+        - caminho: arquivo SQLite (":memory:" para testes)
+        - fonte: objeto com baixar(ticker, inicio, fim); padrão FonteYahoo()
+        """
+        self.caminho = caminho
+        self.fonte = fonte if fonte is not None else FonteYahoo()
+        self.conn = sqlite3.connect(caminho)
+
+        # PRIMARY KEY (ticker, data) + WITHOUT ROWID: as linhas ficam gravadas
+        # agrupadas por ticker e ordenadas por data, então cada ticker funciona
+        # como uma partição e os filtros por período viram leituras sequenciais.
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS precos (
+                ticker TEXT NOT NULL,
+                data TEXT NOT NULL,
+                fechamento REAL NOT NULL,
+                PRIMARY KEY (ticker, data)
+            ) WITHOUT ROWID
+            """
+        )
+        self.conn.commit()
+
+    def fechar(self):
+        self.conn.close()
+
+    def vazio(self):
+        return self.conn.execute("SELECT 1 FROM precos LIMIT 1").fetchone() is None
+
+    def ultima_data(self, ticker):
+        """Último dia salvo do ticker (ou None se ainda não tem nada)."""
+        linha = self.conn.execute(
+            "SELECT MAX(data) FROM precos WHERE ticker = ?", (ticker,)
+        ).fetchone()
+        return None if linha[0] is None else date.fromisoformat(linha[0])
+
+    def salvar(self, ticker, serie):
+        """Grava (ou sobrescreve) os preços de um ticker. Retorna quantas linhas."""
+        serie = serie.dropna()
+        linhas = [
+            (ticker, pd.Timestamp(dia).strftime("%Y-%m-%d"), float(valor))
+            for dia, valor in serie.items()
+        ]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO precos (ticker, data, fechamento) VALUES (?, ?, ?)",
+                linhas
+            )
+        return len(linhas)
+
+    def importar_csv(self, caminho_csv):
+        """Carrega o CSV antigo (formato largo: datas x tickers) para dentro do banco."""
+        precos = pd.read_csv(caminho_csv, index_col=0, parse_dates=True)
+        return {ticker: self.salvar(ticker, precos[ticker]) for ticker in precos.columns}
+
+    def atualizar(self, tickers, inicio="2015-01-01", fim=None, recarregar=False):
+        """
+        Baixa só o período que falta de cada ticker e anexa no banco.
+
+        - tickers: lista de tickers
+        - inicio: data inicial para tickers que ainda não estão no banco
+        - fim: data final exclusiva (None = até hoje)
+        - recarregar: apaga e baixa o ticker inteiro de novo (ex: após ajuste de proventos)
+
+        Retorna:
+            dict ticker -> quantidade de linhas gravadas
+        """
+        gravadas = {}
+        for ticker in tickers:
+            if recarregar:
+                with self.conn:
+                    self.conn.execute("DELETE FROM precos WHERE ticker = ?", (ticker,))
+
+            ultima = self.ultima_data(ticker)
+            # o último dia é baixado de novo: o fechamento dele pode ter sido parcial
+            inicio_ticker = inicio if ultima is None else ultima.isoformat()
+
+            if fim is not None and pd.Timestamp(inicio_ticker) >= pd.Timestamp(fim):
+                gravadas[ticker] = 0
+                continue
+
+            serie = self.fonte.baixar(ticker, inicio_ticker, fim)
+            gravadas[ticker] = self.salvar(ticker, serie)
+        return gravadas
+
+    def ler(self, tickers=None, inicio=None, fim=None):
+        """
+        Lê os preços em formato largo (datas x tickers), igual ao CSV antigo.
+
+        Só as colunas (tickers) e o período pedidos saem do banco.
+
+        - tickers: lista de tickers (None = todos)
+        - inicio, fim: período fechado [inicio, fim] (None = sem limite)
+        """
+        consulta = "SELECT data, ticker, fechamento FROM precos WHERE 1 = 1"
+        parametros = []
+
+        if tickers is not None:
+            consulta += f" AND ticker IN ({', '.join('?' for _ in tickers)})"
+            parametros.extend(tickers)
+        if inicio is not None:
+            consulta += " AND data >= ?"
+            parametros.append(pd.Timestamp(inicio).strftime("%Y-%m-%d"))
+        if fim is not None:
+            consulta += " AND data <= ?"
+            parametros.append(pd.Timestamp(fim).strftime("%Y-%m-%d"))
+
+        longo = pd.read_sql_query(consulta, self.conn, params=parametros)
+        precos = longo.pivot(index="data", columns="ticker", values="fechamento")
+
+        precos.index = pd.to_datetime(precos.index)
+        precos.index.name = "Date"
+        precos.columns.name = None
+
+        if tickers is not None:
+            precos = precos.reindex(columns=list(tickers))
+        return precos.dropna(how="all")
@@ -0,0 +1,134 @@
+import numpy as np
+import torch
+
+
+def calcular_gae(rewards, values, dones, last_value, gamma=0.99, lam=0.95):
+    """
+    GAE(λ) - Generalized Advantage Estimation para N ambientes de uma vez.
+
+    Os deltas (δ_t = r_t + γ V(s_{t+1}) (1 - done_t) - V(s_t)) e os fatores
+    γλ(1 - done_t) são calculados de uma vez para a matriz [T, N] inteira;
+    sobra só a recorrência A_t = δ_t + γλ(1 - done_t) A_{t+1}, que anda de trás
+    pra frente sobre linhas inteiras (os N ambientes juntos), em views NumPy
+    dos próprios tensores (sem cópia).
+
+    - rewards, values, dones: tensores [T, N]
+    - last_value: V(s_T) de cada ambiente, tensor [N]
+
+    Retorna:
+        advantages [T, N] (sem normalizar)
+    """
+    T, N = rewards.shape
+    next_values = torch.cat([values[1:], last_value.reshape(1, N)], dim=0)
+    nao_terminal = 1.0 - dones
+
+    deltas = (rewards + gamma * next_values * nao_terminal - values).numpy()
+    fatores = (gamma * lam * nao_terminal).numpy()
+
+    advantages = np.empty_like(deltas)
+    gae = np.zeros(N, dtype=deltas.dtype)
+    for t in range(T - 1, -1, -1):
+        gae = deltas[t] + fatores[t] * gae
+        advantages[t] = gae
+
+    return torch.from_numpy(advantages)
+
+
+#? Buffer de rollout com tensores pré-alocados [rollout_len, n_envs, ...]
+class RolloutBuffer:
+    def __init__(self, rollout_len, n_envs, state_dim, action_shape=(), action_dtype=torch.long):
+        """
+        - rollout_len: passos por rollout (T)
+        - n_envs: quantos ambientes em paralelo (N)
+        - state_dim: tamanho do vetor de estado
+        - action_shape: forma de UMA ação (() para ações discretas)
+        - action_dtype: torch.long para discretas, torch.float32 para contínuas
+        """
+        self.rollout_len = rollout_len
+        self.n_envs = n_envs
+        self.state_dim = state_dim
+
+        T, N = rollout_len, n_envs
+        self.states = torch.zeros(T, N, state_dim)
+        self.actions = torch.zeros((T, N) + tuple(action_shape), dtype=action_dtype)
+        self.logprobs = torch.zeros(T, N)
+        self.rewards = torch.zeros(T, N)
+        self.dones = torch.zeros(T, N)
+        self.values = torch.zeros(T, N)
+
+        self.advantages = torch.zeros(T, N)
+        self.returns = torch.zeros(T, N)
+
+        self.pos = 0
+
+    def cheio(self):
+        return self.pos >= self.rollout_len
+
+    def limpar(self):
+        self.pos = 0
+
+    def guardar_estado(self, states):
+        """
+        Copia os estados [N, state_dim] do passo atual para dentro do buffer.
+
+        Retorna a fatia do buffer (tensor [N, state_dim]) para ser usada no
+        forward da política, assim o estado não é copiado duas vezes.
+        """
+        destino = self.states[self.pos]
+        destino.copy_(torch.as_tensor(states))
+        return destino
+
+    def adicionar(self, actions, logprobs, values, rewards, dones):
+        """Grava o resto do passo atual (o estado já veio do guardar_estado) e avança."""
+        p = self.pos
+        self.actions[p].copy_(torch.as_tensor(actions))
+        self.logprobs[p].copy_(torch.as_tensor(logprobs))
+        self.values[p].copy_(torch.as_tensor(values))
+        self.rewards[p].copy_(torch.as_tensor(rewards))
+        self.dones[p].copy_(torch.as_tensor(dones))
+        self.pos += 1
+
+    def calcular_vantagens(self, last_value, gamma=0.99, lam=0.95, normalizar=True):
+        """
+        Preenche returns e advantages com GAE(λ).
+
+        - last_value: V(s_{T}) do estado seguinte ao último passo, tensor [N]
+        - normalizar: normaliza as advantages (média 0, desvio 1) como no compute_gae
+        """
+        adv = calcular_gae(
+            self.rewards, self.values, self.dones, last_value, gamma=gamma, lam=lam
+        )
+        self.returns.copy_(adv + self.values)
+
+        if normalizar:
+            # correction=0 = mesmo desvio padrão do np.std usado antes
+            adv = (adv - adv.mean()) / (adv.std(correction=0) + 1e-8)
+        self.advantages.copy_(adv)
+
+    def minibatches(self, batch_size, generator=None):
+        """
+        Percorre o rollout em minibatches embaralhados.
+
+        Os tensores [T, N, ...] são vistos como [T * N, ...] (view, sem cópia);
+        só os índices de cada minibatch são materializados.
+
+        Retorna (yield):
+            states, actions, old_logprobs, returns, advantages
+        """
+        total = self.rollout_len * self.n_envs
+        states = self.states.view(total, self.state_dim)
+        actions = self.actions.view((total,) + self.actions.shape[2:])
+        logprobs = self.logprobs.view(total)
+        returns = self.returns.view(total)
+        advantages = self.advantages.view(total)
+
+        idxs = torch.randperm(total, generator=generator)
+        for start in range(0, total, batch_size):
+            batch_idx = idxs[start:start + batch_size]
+            yield (
+                states[batch_idx],
+                actions[batch_idx],
+                logprobs[batch_idx],
+                returns[batch_idx],
+                advantages[batch_idx],
+            )
@@ -0,0 +1,322 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+import torch
+
+from instrumentacao import PerfiladorNulo
+from modelos import PolicyDirichlet, PolicyMLP, ValueMLP
+from treino_ppo import ColetorLocal, criar_buffer
+from vec_env import PortfolioVecEnv, _como_array
+
+CAMPOS_MERCADO = ("ret", "r_media", "v_media", "dd", "regime_ids", "cluster_ids")
+
+
+#? Dados de mercado em memória compartilhada (uma cópia para todos os processos)
+class MercadoCompartilhado:
+    def __init__(self, ret, r_media, v_media, dd, regime_ids, cluster_ids):
+        """
+        Copia os arrays de mercado para blocos de shared memory.
+
+        Os processos de coleta só "anexam" esses blocos (descritor()), então
+        os dados não são copiados nem re-serializados para cada worker.
+        """
+        origem = {
+            "ret": _como_array(ret),
+            "r_media": _como_array(r_media),
+            "v_media": _como_array(v_media),
+            "dd": _como_array(dd),
+            "regime_ids": np.asarray(regime_ids, dtype=np.int64),
+            "cluster_ids": np.asarray(cluster_ids, dtype=np.float32),
+        }
+        self._blocos = []
+        self._descritor = {}
+        for nome in CAMPOS_MERCADO:
+            arr = origem[nome]
+            bloco = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=bloco.buf)[...] = arr
+            self._blocos.append(bloco)
+            self._descritor[nome] = (bloco.name, arr.shape, arr.dtype.str)
+
+    def descritor(self):
+        """Nome, shape e dtype de cada bloco: é isso que vai para os workers."""
+        return dict(self._descritor)
+
+    def fechar(self):
+        for bloco in self._blocos:
+            bloco.close()
+            bloco.unlink()
+        self._blocos = []
+
+
+def anexar_mercado(descritor):
+    """
+    Abre os blocos de shared memory descritos e devolve (arrays, blocos).
+
+    Os blocos precisam continuar vivos enquanto os arrays forem usados.
+    """
+    arrays, blocos = {}, []
+    for nome, (nome_bloco, shape, dtype) in descritor.items():
+        bloco = shared_memory.SharedMemory(name=nome_bloco)
+        arrays[nome] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=bloco.buf)
+        blocos.append(bloco)
+    return arrays, blocos
+
+
+def _worker(conn, descritor, num_envs, seed, config_env, num_actions, acao_continua):
+    """
+    Processo de coleta: mantém seu próprio PortfolioVecEnv e cópias da política.
+
+    A cada pedido "coletar" recebe os pesos atuais das redes, coleta rollout_len
+    passos e devolve a trajetória (em arrays NumPy) para o processo principal.
+    Os pedidos "estado" e "restaurar" servem para o checkpoint do treino.
+    """
+    # cada worker usa 1 thread: o paralelismo vem dos processos
+    torch.set_num_threads(1)
+    torch.manual_seed(seed)
+
+    arrays, blocos = anexar_mercado(descritor)
+    envs = PortfolioVecEnv(
+        arrays["ret"], arrays["r_media"], arrays["v_media"], arrays["dd"],
+        arrays["regime_ids"], arrays["cluster_ids"],
+        num_envs=num_envs, seed=seed, **config_env
+    )
+    coletor = ColetorLocal(envs)
+    policy = (PolicyDirichlet if acao_continua else PolicyMLP)(envs.state_dim, num_actions)
+    value = ValueMLP(envs.state_dim)
+    buffer = None
+
+    try:
+        while True:
+            pedido = conn.recv()
+            if pedido is None:
+                break
+
+            comando, *args = pedido
+            if comando == "estado":
+                conn.send({"coletor": coletor.estado(), "torch_rng": torch.get_rng_state().numpy()})
+                continue
+            if comando == "restaurar":
+                coletor.restaurar(args[0]["coletor"])
+                torch.set_rng_state(torch.from_numpy(np.array(args[0]["torch_rng"], dtype=np.uint8)))
+                conn.send(True)
+                continue
+
+            pesos_policy, pesos_value, rollout_len = args
+            policy.load_state_dict(pesos_policy)
+            value.load_state_dict(pesos_value)
+
+            if buffer is None or buffer.rollout_len != rollout_len:
+                buffer = criar_buffer(policy, rollout_len, num_envs, envs.state_dim)
+
+            episodios = []
+            last_value = coletor.coletar(policy, value, buffer, episodios.append)
+
+            conn.send((
+                buffer.states.numpy(),
+                buffer.actions.numpy(),
+                buffer.logprobs.numpy(),
+                buffer.values.numpy(),
+                buffer.rewards.numpy(),
+                buffer.dones.numpy(),
+                last_value.numpy(),
+                [float(total) for total in episodios],
+            ))
+    finally:
+        conn.close()
+        for bloco in blocos:
+            bloco.close()
+
+
+#? Coletor com vários processos: mesmo contrato do ColetorLocal
+def dividir_envs(num_envs, max_workers):
+    """
+    Reparte num_envs carteiras entre no máximo max_workers processos, sem
+    mudar o total (e portanto o tamanho do batch do PPO) de máquina para máquina.
+
+    As partes podem ser desiguais (ex: 7 envs em 4 workers -> [2, 2, 2, 1]),
+    então um num_envs primo também usa todos os núcleos.
+
+    Retorna:
+        lista com quantos envs cada worker simula (len = número de workers)
+    """
+    num_workers = max(1, min(max_workers, num_envs))
+    return [len(parte) for parte in np.array_split(np.arange(num_envs), num_workers)]
+
+
+class ColetorParalelo:
+    def __init__(
+        self,
+        mercado,
+        num_workers,
+        envs_por_worker,
+        num_actions,
+        seed=0,
+        config_env=None,
+        contexto="spawn",
+        acao_continua=False
+    ):
+        """
+        - mercado: MercadoCompartilhado com os dados (treino)
+        - num_workers: quantos processos de coleta (ex: número de núcleos)
+        - envs_por_worker: carteiras simuladas por processo (int) ou uma lista com
+          a quantidade de cada worker (ex: dividir_envs(num_envs, os.cpu_count()))
+        - num_actions: tamanho da saída da política (NUM_ATIVOS * 2 na PolicyMLP,
+          NUM_ATIVOS na PolicyDirichlet)
+        - seed: semente base (worker i usa seed + i)
+        - config_env: kwargs extras do PortfolioVecEnv (episodio_len, lambda_dd...)
+        - contexto: método de início dos processos ("spawn" funciona em qualquer SO)
+        - acao_continua: True para treinar uma PolicyDirichlet (step_pesos)
+        """
+        if isinstance(envs_por_worker, int):
+            envs_por_worker = [envs_por_worker] * num_workers
+        if len(envs_por_worker) != num_workers:
+            raise ValueError(
+                f"envs_por_worker tem {len(envs_por_worker)} partes para {num_workers} workers."
+            )
+        self.num_workers = num_workers
+        self.envs_por_worker = list(envs_por_worker)
+        self.num_envs = sum(self.envs_por_worker)
+        # cada worker ocupa as colunas [inicio, inicio + envs) do buffer [T, N, ...]
+        inicios = np.cumsum([0] + self.envs_por_worker)
+        self._fatias = [slice(int(i), int(f)) for i, f in zip(inicios[:-1], inicios[1:])]
+
+        descritor = mercado.descritor()
+        num_assets = descritor["ret"][1][1]
+        self.state_dim = num_assets + 3 + num_assets
+
+        ctx = mp.get_context(contexto)
+        self._conns = []
+        self._processos = []
+        for i in range(num_workers):
+            conn_pai, conn_filho = ctx.Pipe()
+            processo = ctx.Process(
+                target=_worker,
+                args=(
+                    conn_filho, descritor, self.envs_por_worker[i], seed + i,
+                    config_env or {}, num_actions, acao_continua
+                ),
+                daemon=True
+            )
+            processo.start()
+            conn_filho.close()
+            self._conns.append(conn_pai)
+            self._processos.append(processo)
+
+    def coletar(self, policy, value, buffer, log_episodio=None, perfil=None):
+        """
+        Sincroniza os pesos nos workers, coleta em paralelo e junta tudo no buffer.
+
+        Retorna:
+            V(s) do estado seguinte ao rollout de cada ambiente, tensor [N]
+        """
+        perfil = perfil or PerfiladorNulo()
+
+        with perfil.fase("sincronizar_pesos"):
+            pedido = ("coletar", policy.state_dict(), value.state_dict(), buffer.rollout_len)
+            for conn in self._conns:
+                conn.send(pedido)
+
+        buffer.limpar()
+        last_value = torch.empty(self.num_envs)
+
+        for conn, fatia in zip(self._conns, self._fatias):
+            with perfil.fase("espera_workers"):
+                states, actions, logprobs, values, rewards, dones, lv, episodios = conn.recv()
+
+            buffer.states[:, fatia] = torch.from_numpy(states)
+            buffer.actions[:, fatia] = torch.from_numpy(actions)
+            buffer.logprobs[:, fatia] = torch.from_numpy(logprobs)
+            buffer.values[:, fatia] = torch.from_numpy(values)
+            buffer.rewards[:, fatia] = torch.from_numpy(rewards)
+            buffer.dones[:, fatia] = torch.from_numpy(dones)
+            last_value[fatia] = torch.from_numpy(lv)
+            perfil.contar("passos_env", rewards.size)
+            perfil.contar("episodios", len(episodios))
+
+            if log_episodio is not None:
+                for total in episodios:
+                    log_episodio(total)
+
+        buffer.pos = buffer.rollout_len
+        return last_value
+
+    def estado(self):
+        """Estado de cada worker (ambientes + gerador do torch), para o checkpoint."""
+        for conn in self._conns:
+            conn.send(("estado",))
+        return {"workers": [conn.recv() for conn in self._conns]}
+
+    def restaurar(self, estado):
+        workers = estado["workers"]
+        if len(workers) != self.num_workers:
+            raise ValueError(
+                f"Checkpoint tem {len(workers)} workers, o coletor tem {self.num_workers}."
+            )
+        for conn, estado_worker in zip(self._conns, workers):
+            conn.send(("restaurar", estado_worker))
+        for conn in self._conns:
+            conn.recv()
+
+    def fechar(self):
+        for conn in self._conns:
+            try:
+                conn.send(None)
+                conn.close()
+            except (BrokenPipeError, OSError):
+                pass
+        for processo in self._processos:
+            processo.join(timeout=5)
+            if processo.is_alive():
+                processo.terminate()
+        self._conns = []
+        self._processos = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    from teste import (
+        ret_train, r_media_train, v_media_train, dd_train, regime_ids_train,
+        cluster_ids, NUM_ATIVOS
+    )
+    from treino_ppo import CONFIG_PADRAO, init_weights, treinar_ppo_gae
+
+    config = dict(CONFIG_PADRAO)
+    torch.manual_seed(config["seed"])
+
+    num_actions = NUM_ATIVOS * 2
+    state_dim = NUM_ATIVOS + 3 + NUM_ATIVOS
+
+    policy = PolicyMLP(state_dim, num_actions)
+    value = ValueMLP(state_dim)
+    policy.apply(init_weights)
+    value.apply(init_weights)
+
+    envs_por_worker = dividir_envs(config["num_envs"], os.cpu_count() or 1)
+    mercado = MercadoCompartilhado(
+        ret_train, r_media_train, v_media_train, dd_train, regime_ids_train, cluster_ids
+    )
+    try:
+        with ColetorParalelo(
+            mercado,
+            num_workers=len(envs_por_worker),
+            envs_por_worker=envs_por_worker,
+            num_actions=num_actions,
+            seed=config["seed"]
+        ) as coletor:
+            treinar_ppo_gae(
+                coletor, policy, value, config,
+                perfil="perfil_treino.jsonl",
+                checkpoint="checkpoint_ppo.pt",
+                retomar="--retomar" in sys.argv
+            )
+    finally:
+        mercado.fechar()
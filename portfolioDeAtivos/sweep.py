@@ -0,0 +1,268 @@
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing as mp
+
+import numpy as np
+import pandas as pd
+import torch
+
+from backtest import avaliar_janelas
+from modelos import PolicyMLP, ValueMLP
+from rollout_workers import MercadoCompartilhado, anexar_mercado
+from treino_ppo import CONFIG_PADRAO, init_weights, treinar_ppo_gae
+from vec_env import PortfolioVecEnv
+
+# Parâmetros que vão para o PortfolioVecEnv; o resto vai para o config do PPO
+PARAMS_ENV = ("lambda_dd", "lambda_tc", "max_weight", "passo", "episodio_len")
+
+# Espaço de busca padrão: lista = escolhe um valor, ("log"|"uniforme"|"inteiro", min, max) = sorteia
+ESPACO_PADRAO = {
+    "gamma": [0.95, 0.98, 0.99, 0.995],
+    "clip_eps": ("uniforme", 0.1, 0.3),
+    "ppo_epochs": [2, 4, 8],
+    "rollout_len": [128, 256, 512],
+    "lr": ("log", 1e-5, 1e-3),
+    "lambda_dd": ("log", 0.005, 0.5),
+    "lambda_tc": ("log", 1e-4, 1e-2),
+    # 0.1 fica de fora: a política argmax satura o cap e os trials empatam no val_score (README)
+    "max_weight": [0.15, 0.2, 0.3],
+}
+
+
+#? Geração das configurações
+def grade(espaco):
+    """
+    Todas as combinações de um espaço só com listas.
+
+    Ex: grade({"gamma": [0.98, 0.99], "lr": [1e-4, 3e-4]}) -> 4 configs
+    """
+    nomes = list(espaco)
+    return [dict(zip(nomes, valores)) for valores in itertools.product(*(espaco[n] for n in nomes))]
+
+
+def _sortear(spec, rng):
+    if isinstance(spec, list):
+        return spec[rng.integers(len(spec))]
+    tipo, minimo, maximo = spec
+    if tipo == "uniforme":
+        return float(rng.uniform(minimo, maximo))
+    if tipo == "log":
+        return float(math.exp(rng.uniform(math.log(minimo), math.log(maximo))))
+    if tipo == "inteiro":
+        return int(rng.integers(minimo, maximo + 1))
+    raise ValueError(f"Tipo de distribuição desconhecido: {tipo}")
+
+
+def busca_aleatoria(espaco, num_trials, seed=0):
+    """
+    num_trials configurações sorteadas do espaço.
+
+    - espaco: dict nome -> lista de valores ou ("uniforme" | "log" | "inteiro", min, max)
+    """
+    rng = np.random.default_rng(seed)
+    return [{nome: _sortear(spec, rng) for nome, spec in espaco.items()} for _ in range(num_trials)]
+
+
+#? Estado de cada processo do pool (dados anexados da shared memory)
+_DADOS = {}
+
+
+def _iniciar_worker(descritor_treino, descritor_val, parciais, trava):
+    # o paralelismo vem dos processos: 1 thread de torch por trial
+    torch.set_num_threads(1)
+    _DADOS["treino"], blocos_treino = anexar_mercado(descritor_treino)
+    _DADOS["val"], blocos_val = anexar_mercado(descritor_val)
+    _DADOS["blocos"] = blocos_treino + blocos_val
+    _DADOS["parciais"] = parciais
+    _DADOS["trava"] = trava
+
+
+def _argumentos_mercado(arrays):
+    return (
+        arrays["ret"], arrays["r_media"], arrays["v_media"], arrays["dd"],
+        arrays["regime_ids"], arrays["cluster_ids"]
+    )
+
+
+# Métrica da validação (coluna do avaliar_janelas). Não pode ter termo de penalidade:
+# lambda_dd/lambda_tc variam entre os trials e o reward deixaria de ser comparável.
+METRICA_VALIDACAO = "log_ret"
+
+
+def metrica_validacao(policy, arrays_val, config_env, tamanho=126, metrica=METRICA_VALIDACAO):
+    """
+    Média de `metrica` ("log_ret", "sharpe"...) nas janelas sem sobreposição
+    da validação, com ação argmax e as mesmas regras de carteira do treino.
+    """
+    tamanho = min(tamanho, len(arrays_val["ret"]) - 2)
+    relatorio = avaliar_janelas(
+        policy, *_argumentos_mercado(arrays_val),
+        tamanho=tamanho,
+        passo=tamanho,
+        modo="deterministico",
+        passo_acao=config_env.get("passo", 0.02),
+        max_weight=config_env.get("max_weight", 0.2),
+        lambda_dd=config_env.get("lambda_dd", 0.02),
+        lambda_tc=config_env.get("lambda_tc", 0.001),
+    )
+    return float(relatorio[metrica].mean())
+
+
+def _deve_parar(avaliacao, valor, min_trials):
+    """
+    Regra da mediana: para o trial se, na mesma avaliação, ele estiver abaixo
+    da mediana dos trials que já passaram por ali (com pelo menos min_trials).
+    """
+    parciais, trava = _DADOS["parciais"], _DADOS["trava"]
+    with trava:
+        anteriores = list(parciais.get(avaliacao, []))
+        parciais[avaliacao] = anteriores + [valor]
+
+    return len(anteriores) >= min_trials and valor < float(np.median(anteriores))
+
+
+def _rodar_trial(indice, params, config_base, avaliar_a_cada, min_trials):
+    config = {**CONFIG_PADRAO, **config_base}
+    config.update({k: v for k, v in params.items() if k not in PARAMS_ENV})
+    config_env = {k: v for k, v in params.items() if k in PARAMS_ENV}
+
+    torch.manual_seed(config["seed"])
+    envs = PortfolioVecEnv(
+        *_argumentos_mercado(_DADOS["treino"]),
+        num_envs=config["num_envs"], seed=config["seed"], **config_env
+    )
+    policy = PolicyMLP(envs.state_dim, envs.num_assets * 2)
+    value = ValueMLP(envs.state_dim)
+    policy.apply(init_weights)
+    value.apply(init_weights)
+
+    avaliacoes = []
+
+    def ao_fim_iteracao(it, metricas):
+        ultima = it == config["num_iterations"] - 1
+        if (it + 1) % avaliar_a_cada != 0 and not ultima:
+            return False
+        valor = metrica_validacao(policy, _DADOS["val"], config_env)
+        avaliacoes.append(valor)
+        return not ultima and _deve_parar(len(avaliacoes), valor, min_trials)
+
+    inicio = time.perf_counter()
+    historico = treinar_ppo_gae(envs, policy, value, config, verbose=False, ao_fim_iteracao=ao_fim_iteracao)
+
+    return {
+        "trial": indice,
+        **params,
+        "val_score": avaliacoes[-1],
+        "melhor_val_score": max(avaliacoes),
+        "iteracoes": len(historico),
+        "parado_cedo": len(historico) < config["num_iterations"],
+        "train_avg_reward": historico[-1]["avg_reward"],
+        "tempo": time.perf_counter() - inicio,
+    }
+
+
+#? Sweep: um trial por processo, todos lendo os mesmos arrays em shared memory
+def rodar_sweep(
+    configs,
+    treino,
+    validacao,
+    cluster_ids,
+    config_base=None,
+    num_workers=None,
+    avaliar_a_cada=5,
+    min_trials=4,
+    caminho_resultados="sweep_resultados.csv",
+    contexto="spawn",
+    verbose=True
+):
+    """
+    Roda um treino PPO + GAE por configuração e monta a tabela de resultados.
+
+    - configs: lista de dicts (ver grade / busca_aleatoria); chaves em PARAMS_ENV
+      vão para o PortfolioVecEnv, as outras para o config do treino
+    - treino, validacao: tuplas (ret, r_media, v_media, dd, regime_ids)
+    - cluster_ids: clusters dos ativos
+    - config_base: config comum a todos os trials (ex: num_iterations)
+    - num_workers: processos em paralelo (None = número de núcleos)
+    - avaliar_a_cada: de quantas em quantas iterações medir o reward de validação
+    - min_trials: avaliações anteriores necessárias antes de parar trials ruins
+    - caminho_resultados: CSV regravado a cada trial concluído (None = não grava)
+
+    Retorna:
+        DataFrame com uma linha por trial, do melhor para o pior val_score (METRICA_VALIDACAO);
+        trials que deram erro ficam no fim, sem val_score e com a exceção na coluna "erro"
+    """
+    config_base = config_base or {}
+    num_workers = num_workers or os.cpu_count() or 1
+
+    mercado_treino = MercadoCompartilhado(*treino, cluster_ids)
+    mercado_val = MercadoCompartilhado(*validacao, cluster_ids)
+    ctx = mp.get_context(contexto)
+    gerente = ctx.Manager()
+    resultados = []
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=ctx,
+            initializer=_iniciar_worker,
+            initargs=(mercado_treino.descritor(), mercado_val.descritor(), gerente.dict(), gerente.Lock()),
+        ) as pool:
+            futuros = {
+                pool.submit(_rodar_trial, i, params, config_base, avaliar_a_cada, min_trials): (i, params)
+                for i, params in enumerate(configs)
+            }
+            for futuro in as_completed(futuros):
+                try:
+                    resultado = futuro.result()
+                except Exception as erro:
+                    # um trial com erro (logits NaN, combinação ruim, worker sem memória)
+                    # entra na tabela como falho e o sweep continua com os outros
+                    indice, params = futuros[futuro]
+                    resultado = {"trial": indice, **params, "val_score": float("nan"), "erro": repr(erro)}
+                    if verbose:
+                        print(f"[SWEEP] trial {indice} | falhou: {erro!r}")
+                else:
+                    if verbose:
+                        print(f"[SWEEP] trial {resultado['trial']} | "
+                              f"val_score={resultado['val_score']:.5f} | "
+                              f"iterações={resultado['iteracoes']}"
+                              f"{' (parado cedo)' if resultado['parado_cedo'] else ''}")
+                resultados.append(resultado)
+                if caminho_resultados is not None:
+                    _tabela(resultados).to_csv(caminho_resultados, index=False)
+    finally:
+        gerente.shutdown()
+        mercado_treino.fechar()
+        mercado_val.fechar()
+
+    return _tabela(resultados)
+
+
+def _tabela(resultados):
+    return pd.DataFrame(resultados).sort_values(
+        "val_score", ascending=False, na_position="last", ignore_index=True
+    )
+
+
+if __name__ == "__main__":
+    from teste import (
+        ret_train, r_media_train, v_media_train, dd_train, regime_ids_train, cluster_ids
+    )
+
+    # validação = últimos 20% do treino (o conjunto de teste fica de fora do sweep)
+    corte = int(len(ret_train) * 0.8)
+    series = (ret_train, r_media_train, v_media_train, dd_train, np.asarray(regime_ids_train))
+    treino = tuple(s[:corte] for s in series)
+    validacao = tuple(s[corte:] for s in series)
+
+    tabela = rodar_sweep(
+        busca_aleatoria(ESPACO_PADRAO, num_trials=24, seed=CONFIG_PADRAO["seed"]),
+        treino,
+        validacao,
+        cluster_ids,
+    )
+    print(tabela.to_string())
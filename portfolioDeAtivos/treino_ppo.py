@@ -0,0 +1,361 @@
+import os
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from torch.distributions import Categorical, Dirichlet
+
+from checkpoint import (
+    GravadorCheckpoint, arrays_para_tensores, carregar_checkpoint, tensores_para_arrays
+)
+from features import VERSAO_FEATURES, checar_versao_features
+from instrumentacao import Perfilador, PerfiladorNulo, resumo
+from rollout_buffer import RolloutBuffer
+
+# Mesmos hiperparâmetros do PPO + GAE (Semana 3) do train_ppo, mais num_envs
+CONFIG_PADRAO = {
+    "gamma": 0.99,          # desconto das recompensas futuras
+    "lam": 0.95,            # λ do GAE
+    "clip_eps": 0.2,        # clipping do PPO
+    "ppo_epochs": 4,        # quantas vezes reaproveitar o mesmo rollout
+    "rollout_len": 256,     # passos por iteração (por ambiente)
+    "batch_size": 64,       # tamanho do minibatch
+    "lr": 1e-4,
+    "entropy_coef": 0.01,
+    "value_coef": 0.5,
+    "num_envs": 16,         # carteiras simuladas em paralelo no PortfolioVecEnv
+    "num_iterations": 50,
+    "seed": 5,
+}
+
+
+def init_weights(m):
+    if isinstance(m, nn.Linear):
+        nn.init.xavier_uniform_(m.weight)
+        nn.init.zeros_(m.bias)
+
+
+def criar_distribuicao(policy, saida):
+    """
+    Distribuição das ações a partir da saída da política:
+    Categorical sobre os logits (PolicyMLP) ou Dirichlet sobre as
+    concentrações (PolicyDirichlet, modo de ação contínua).
+    """
+    if getattr(policy, "acao_continua", False):
+        return Dirichlet(saida)
+    return Categorical(logits=saida)
+
+
+def criar_buffer(policy, rollout_len, n_envs, state_dim):
+    """RolloutBuffer com o formato de ação certo para a política."""
+    if getattr(policy, "acao_continua", False):
+        return RolloutBuffer(
+            rollout_len, n_envs, state_dim,
+            action_shape=(policy.num_assets,), action_dtype=torch.float32
+        )
+    return RolloutBuffer(rollout_len, n_envs, state_dim)
+
+
+#? 1) COLETA DE TRAJETÓRIA: um forward em lote por passo para os N ambientes
+def coletar_rollout(envs, policy, value, buffer, states, ep_reward, log_episodio=None, perfil=None):
+    """
+    Preenche o buffer com rollout_len passos de todos os ambientes.
+
+    - envs: PortfolioVecEnv (ou qualquer env com step_acoes / step_pesos em lote)
+    - states: estados atuais [N, state_dim] (NumPy)
+    - ep_reward: array [N] com a recompensa acumulada do episódio de cada ambiente
+    - log_episodio: função chamada com a recompensa total de cada episódio que termina
+    - perfil: Perfilador (opcional) para medir env, forward e amostragem
+
+    Retorna:
+        states do passo seguinte ao último (para o bootstrap do GAE)
+    """
+    perfil = perfil or PerfiladorNulo()
+    continua = getattr(policy, "acao_continua", False)
+    buffer.limpar()
+
+    with torch.no_grad():
+        while not buffer.cheio():
+            with perfil.fase("buffer"):
+                state = buffer.guardar_estado(states)
+
+            with perfil.fase("forward_policy"):
+                logits = policy(state)
+            if not torch.isfinite(logits).all():
+                # só os ambientes com problema, para a mensagem caber no log
+                ruins = (~torch.isfinite(logits)).any(dim=-1).nonzero().flatten().tolist()
+                raise RuntimeError(
+                    f"Logits NaN/Inf em PPO nos ambientes {ruins}: "
+                    f"state={state[ruins].tolist()} logits={logits[ruins].tolist()}"
+                )
+
+            with perfil.fase("amostragem"):
+                dist = criar_distribuicao(policy, logits)
+                action = dist.sample()
+                log_prob = dist.log_prob(action)
+
+            with perfil.fase("forward_value"):
+                V = value(state).squeeze(-1)
+
+            with perfil.fase("env"):
+                if continua:
+                    states, rewards, dones = envs.step_pesos(action.numpy())
+                else:
+                    states, rewards, dones = envs.step_acoes(action.numpy())
+
+            with perfil.fase("buffer"):
+                buffer.adicionar(action, log_prob, V, rewards, dones)
+            perfil.contar("passos_env", len(rewards))
+
+            ep_reward += rewards
+            for i in np.flatnonzero(dones):
+                if log_episodio is not None:
+                    log_episodio(ep_reward[i])
+                ep_reward[i] = 0.0
+                perfil.contar("episodios")
+
+    return states
+
+
+class ColetorLocal:
+    """
+    Coleta no próprio processo, com um PortfolioVecEnv.
+
+    Guarda entre as iterações o estado atual e a recompensa acumulada do
+    episódio de cada ambiente (o reset acontece só uma vez, fora do loop).
+    """
+
+    def __init__(self, envs):
+        self.envs = envs
+        self.num_envs = envs.num_envs
+        self.state_dim = envs.state_dim
+        self.states = envs.reset()
+        self.ep_reward = np.zeros(envs.num_envs)
+
+    def coletar(self, policy, value, buffer, log_episodio=None, perfil=None):
+        """Preenche o buffer e devolve V(s) do estado seguinte ao rollout, tensor [N]."""
+        self.states = coletar_rollout(
+            self.envs, policy, value, buffer, self.states, self.ep_reward, log_episodio, perfil
+        )
+        with torch.no_grad():
+            return value(torch.as_tensor(self.states)).squeeze(-1)
+
+    def estado(self):
+        """Ambientes (no meio do episódio), estado atual e recompensa acumulada."""
+        return {
+            "envs": self.envs.estado(),
+            "states": self.states.copy(),
+            "ep_reward": self.ep_reward.copy(),
+        }
+
+    def restaurar(self, estado):
+        self.envs.restaurar(estado["envs"])
+        self.states = np.array(estado["states"], dtype=np.float32)
+        self.ep_reward[:] = estado["ep_reward"]
+
+
+#? 2) PPO UPDATES: várias epochs em minibatches sobre o mesmo rollout
+def atualizar_ppo(policy, value, optimizerP, optimizerV, buffer, config, generator=None, perfil=None):
+    perfil = perfil or PerfiladorNulo()
+    for epoch in range(config["ppo_epochs"]):
+        with perfil.fase("update"):
+            for batch in buffer.minibatches(config["batch_size"], generator=generator):
+                batch_states, batch_actions, batch_old_logprobs, batch_returns, batch_advantages = batch
+
+                logits_new = policy(batch_states)
+                dist_new = criar_distribuicao(policy, logits_new)
+                new_logprobs = dist_new.log_prob(batch_actions)
+                entropy = dist_new.entropy().mean()
+
+                ratios = torch.exp(new_logprobs - batch_old_logprobs)
+
+                surr1 = ratios * batch_advantages
+                surr2 = torch.clamp(ratios, 1.0 - config["clip_eps"], 1.0 + config["clip_eps"]) * batch_advantages
+                policy_loss = -torch.min(surr1, surr2).mean()
+
+                V_pred = value(batch_states).squeeze(-1)
+                value_loss = nn.functional.mse_loss(V_pred, batch_returns)
+
+                loss = policy_loss + config["value_coef"] * value_loss - config["entropy_coef"] * entropy
+
+                optimizerP.zero_grad()
+                optimizerV.zero_grad()
+                loss.backward()
+                optimizerP.step()
+                optimizerV.step()
+        perfil.contar("epochs")
+
+
+def treinar_ppo_gae(
+    envs,
+    policy,
+    value,
+    config=None,
+    verbose=True,
+    perfil=None,
+    checkpoint=None,
+    checkpoint_a_cada=10,
+    retomar=False,
+    ao_fim_iteracao=None
+):
+    """
+    Loop de treino PPO + GAE usando o PortfolioVecEnv e o RolloutBuffer.
+
+    - envs: PortfolioVecEnv já criado (num_envs ambientes) ou um coletor
+      (objeto com num_envs, state_dim e coletar(policy, value, buffer, log_episodio);
+      estado()/restaurar() para o checkpoint), por exemplo o ColetorParalelo do rollout_workers.py
+    - policy, value: PolicyMLP (ou PolicyDirichlet, ação contínua) e ValueMLP
+    - config: dict com os hiperparâmetros (o que faltar vem do CONFIG_PADRAO)
+    - perfil: Perfilador (ou caminho de um .jsonl) para medir cada fase do loop;
+      uma linha por iteração com passos/s, update por epoch e tempo por fase
+    - checkpoint: arquivo do checkpoint (None = não salva)
+    - checkpoint_a_cada: de quantas em quantas iterações salvar (a última sempre é salva)
+    - retomar: se True e o checkpoint existir, continua dali (redes, otimizadores,
+      geradores aleatórios, ambientes no meio do episódio e históricos)
+    - ao_fim_iteracao: função (it, metricas) chamada ao fim de cada iteração;
+      se devolver True o treino para ali (early stopping do sweep.py)
+
+    Retorna:
+        lista com um dict de métricas por iteração
+    """
+    config = {**CONFIG_PADRAO, **(config or {})}
+    if isinstance(perfil, str):
+        perfil = Perfilador(perfil)
+    medir = perfil is not None
+    perfil = perfil or PerfiladorNulo()
+
+    optimizerP = optim.Adam(policy.parameters(), lr=config["lr"])
+    optimizerV = optim.Adam(value.parameters(), lr=config["lr"])
+
+    coletor = envs if hasattr(envs, "coletar") else ColetorLocal(envs)
+    buffer = criar_buffer(policy, config["rollout_len"], coletor.num_envs, coletor.state_dim)
+    generator = torch.Generator().manual_seed(config["seed"])
+
+    episodios = []
+
+    def log_episodio(total):
+        if verbose:
+            print(f"Episódio {len(episodios)} -> reward total = {total:.5f}")
+        episodios.append(float(total))
+
+    historico = []
+    inicio = 0
+
+    if retomar and checkpoint is not None and os.path.exists(checkpoint):
+        salvo = carregar_checkpoint(checkpoint)
+        checar_versao_features(salvo.get("versao_features"), checkpoint)
+        policy.load_state_dict(salvo["policy"])
+        value.load_state_dict(salvo["value"])
+        optimizerP.load_state_dict(salvo["optimizerP"])
+        optimizerV.load_state_dict(salvo["optimizerV"])
+        generator.set_state(salvo["generator"])
+        torch.set_rng_state(salvo["torch_rng"])
+        coletor.restaurar(tensores_para_arrays(salvo["coletor"]))
+        episodios.extend(salvo["episodios"])
+        historico.extend(salvo["historico"])
+        inicio = salvo["iteracao"] + 1
+        if verbose:
+            print(f"Retomando de {checkpoint} na iteração {inicio}")
+
+    gravador = GravadorCheckpoint(checkpoint) if checkpoint is not None else None
+
+    def estado_treino(it):
+        return {
+            "iteracao": it,
+            "versao_features": VERSAO_FEATURES,
+            "config": config,
+            "policy": policy.state_dict(),
+            "value": value.state_dict(),
+            "optimizerP": optimizerP.state_dict(),
+            "optimizerV": optimizerV.state_dict(),
+            "generator": generator.get_state(),
+            "torch_rng": torch.get_rng_state(),
+            "coletor": arrays_para_tensores(coletor.estado()),
+            "episodios": list(episodios),
+            "historico": list(historico),
+        }
+
+    # o relógio começa aqui: a criação dos otimizadores não entra na 1ª iteração
+    perfil.reiniciar()
+
+    try:
+        for it in range(inicio, config["num_iterations"]):
+            # rollout + V(s_{T+1}) do último state (bootstrap do GAE)
+            with perfil.fase("coleta"):
+                last_value = coletor.coletar(policy, value, buffer, log_episodio, perfil=perfil)
+
+            # 3) RETURNS + ADVANTAGES com GAE
+            with perfil.fase("gae"):
+                buffer.calcular_vantagens(last_value, gamma=config["gamma"], lam=config["lam"])
+
+            atualizar_ppo(policy, value, optimizerP, optimizerV, buffer, config, generator, perfil)
+
+            metricas = {
+                "iter": it,
+                "rollout_reward": buffer.rewards.sum().item(),
+                "avg_reward": buffer.rewards.mean().item(),
+                "avg_return": buffer.returns.mean().item(),
+                "episodios": len(episodios),
+            }
+            historico.append(metricas)
+
+            registro = perfil.registrar(**metricas)
+            if medir:
+                metricas["passos_por_seg"] = registro["passos_por_seg"]
+
+            if verbose:
+                print(f"[PPO] Iter {it} | "
+                      f"rollout_reward={metricas['rollout_reward']:.6f} | "
+                      f"avg_reward={metricas['avg_reward']:.6f} | "
+                      f"avg_return={metricas['avg_return']:.6f}")
+                if medir:
+                    print(resumo(registro))
+
+            ultima = it == config["num_iterations"] - 1
+            if gravador is not None and ((it + 1) % checkpoint_a_cada == 0 or ultima):
+                with perfil.fase("checkpoint"):
+                    gravador.salvar(estado_treino(it))
+
+            if ao_fim_iteracao is not None and ao_fim_iteracao(it, metricas):
+                break
+    finally:
+        if gravador is not None:
+            gravador.fechar()
+
+    return historico
+
+
+if __name__ == "__main__":
+    import sys
+
+    from modelos import PolicyMLP, ValueMLP
+    from teste import (
+        ret_train, r_media_train, v_media_train, dd_train, regime_ids_train,
+        cluster_ids, NUM_ATIVOS
+    )
+    from vec_env import PortfolioVecEnv
+
+    config = dict(CONFIG_PADRAO)
+    np.random.seed(config["seed"])
+    torch.manual_seed(config["seed"])
+
+    AÇÕES_POR_ATIVOS = 2
+    num_actions = NUM_ATIVOS * AÇÕES_POR_ATIVOS
+    state_dim = NUM_ATIVOS + 3 + NUM_ATIVOS  # pesos + (r_media, v_media, dd) + clusters
+
+    policy = PolicyMLP(state_dim, num_actions)
+    value = ValueMLP(state_dim)
+    policy.apply(init_weights)
+    value.apply(init_weights)
+
+    envs = PortfolioVecEnv(
+        ret_train, r_media_train, v_media_train, dd_train, regime_ids_train, cluster_ids,
+        num_envs=config["num_envs"], seed=config["seed"]
+    )
+    treinar_ppo_gae(
+        envs, policy, value, config,
+        perfil="perfil_treino.jsonl",
+        checkpoint="checkpoint_ppo.pt",
+        retomar="--retomar" in sys.argv
+    )
@@ -0,0 +1,248 @@
+import numpy as np
+
+from portfolio_lote import KernelsPortfolio
+
+
+def _como_array(dados, dtype=np.float64):
+    """
+    Converte Series/DataFrame do pandas (ou listas) em array NumPy contíguo.
+
+    O PortfolioEnv original faz .iloc a cada passo; aqui extraímos tudo uma
+    vez só para o loop trabalhar apenas com índices inteiros.
+    """
+    if hasattr(dados, "to_numpy"):
+        dados = dados.to_numpy(dtype=dtype)
+    return np.ascontiguousarray(dados, dtype=dtype)
+
+
+#? Versão vetorizada do PortfolioEnv: N carteiras independentes andando juntas
+class PortfolioVecEnv:
+    def __init__(
+        self,
+        ret,
+        r_media,
+        v_media,
+        dd,
+        regime_ids,
+        cluster_ids,
+        num_envs=8,
+        seed=None,
+        inicio_aleatorio=True,
+        episodio_len=None,
+        lambda_dd=0.02,
+        lambda_tc=0.001,
+        passo=0.02,
+        max_weight=0.2
+    ):
+        """
+        Ambiente com N carteiras (mesmas regras do PortfolioEnv) em um único step.
+
+        - ret: retornos diários [T, NUM_ATIVOS] (DataFrame ou array)
+        - r_media, v_media, dd: séries [T] usadas na observação
+        - regime_ids, cluster_ids: iguais aos do PortfolioEnv
+        - num_envs: quantas carteiras simular ao mesmo tempo (N)
+        - seed: semente do gerador dos dias de início
+        - inicio_aleatorio: se True cada carteira começa num dia sorteado,
+          se False todas começam no dia 1 (igual ao PortfolioEnv)
+        - episodio_len: duração máxima do episódio em dias (None = até o fim dos dados)
+        - lambda_dd, lambda_tc: pesos da recompensa (mesmos valores do PortfolioEnv)
+        - passo, max_weight: padrão do step_acoes (mesmos do aplicar_acao_portfolio)
+        """
+        # Tudo vira array contíguo uma única vez (nada de .iloc dentro do step)
+        self.ret = _como_array(ret)
+        self.r_media = _como_array(r_media)
+        self.v_media = _como_array(v_media)
+        self.dd = _como_array(dd)
+        self.regime_ids = np.asarray(regime_ids, dtype=np.int64)
+        self.cluster_ids = np.asarray(cluster_ids, dtype=np.float32)
+
+        self.num_envs = num_envs
+        self.num_steps = self.ret.shape[0]
+        self.num_assets = self.ret.shape[1]
+        self.state_dim = self.num_assets + 3 + self.num_assets
+
+        self.inicio_aleatorio = inicio_aleatorio
+        self.episodio_len = episodio_len
+        self.lambda_dd = lambda_dd
+        self.lambda_tc = lambda_tc
+        self.passo = passo
+        self.max_weight = max_weight
+        self.rng = np.random.default_rng(seed)
+
+        if self.num_steps < 3:
+            raise ValueError("São necessários pelo menos 3 dias de dados para o ambiente.")
+
+        # Estado de cada carteira (uma linha por ambiente)
+        self.t = np.ones(num_envs, dtype=np.int64)
+        self.t_fim = np.full(num_envs, self.num_steps - 1, dtype=np.int64)
+        self.valor_carteira = np.ones(num_envs)
+        self.pico_historico = np.ones(num_envs)
+        self.pesos = np.full((num_envs, self.num_assets), 1.0 / self.num_assets)
+
+        # Buffers pré-alocados reaproveitados a cada passo
+        self._obs = np.zeros((num_envs, self.state_dim), dtype=np.float32)
+        # os clusters nunca mudam, então já ficam gravados na observação
+        self._obs[:, self.num_assets + 3:] = self.cluster_ids
+        self._r_p = np.empty(num_envs)
+        self._fator = np.empty(num_envs)
+        self._drawdown = np.empty(num_envs)
+        self._reward = np.empty(num_envs)
+        self._novos_pesos = np.empty((num_envs, self.num_assets))
+        self.kernels = KernelsPortfolio(num_envs, self.num_assets)
+
+    #? Reinicia todas as carteiras
+    def reset(self, inicios=None):
+        """
+        - inicios: array [N] com o dia de início de cada carteira (opcional,
+          usado no backtest para fixar as janelas); se None segue inicio_aleatorio
+        """
+        self._resetar(np.arange(self.num_envs), inicios)
+        return self._get_state()
+
+    def _resetar(self, idx, inicios=None):
+        """Reinicia só as carteiras cujos índices estão em idx."""
+        if len(idx) == 0:
+            return
+
+        # episódio precisa ter pelo menos 1 passo (ou episodio_len passos)
+        duracao_min = self.episodio_len or 1
+        ultimo_inicio = max(1, self.num_steps - 1 - duracao_min)
+
+        if inicios is not None:
+            self.t[idx] = inicios
+        elif self.inicio_aleatorio:
+            self.t[idx] = self.rng.integers(1, ultimo_inicio + 1, size=len(idx))
+        else:
+            self.t[idx] = 1
+
+        if self.episodio_len is None:
+            self.t_fim[idx] = self.num_steps - 1
+        else:
+            self.t_fim[idx] = np.minimum(self.t[idx] + self.episodio_len, self.num_steps - 1)
+
+        self.pesos[idx] = 1.0 / self.num_assets
+        self.valor_carteira[idx] = 1.0
+        self.pico_historico[idx] = 1.0
+
+    # O "Dia a Dia" das N carteiras de uma vez
+    def step(self, novos_pesos):
+        """
+        Avança todas as carteiras um dia.
+
+        - novos_pesos: array [N, NUM_ATIVOS] com as alocações escolhidas
+
+        Retorna:
+            states [N, state_dim], rewards [N], dones [N]
+            Carteiras que terminam são reiniciadas automaticamente e o state
+            devolvido já é o primeiro state do novo episódio.
+            O array de states é um buffer interno, copie se precisar guardar.
+
+        As recompensas batem com as do PortfolioEnv a menos de ~1e-15: o
+        produto pesos·retornos em lote soma os termos em outra ordem que o np.dot.
+        """
+        novos_pesos = np.asarray(novos_pesos, dtype=np.float64)
+        retornos_dia = self.ret[self.t]  # [N, NUM_ATIVOS]
+
+        # np.dot do PortfolioEnv, só que em lote ([N,1,A] @ [N,A,1]); calculado uma vez
+        # só e reaproveitado na recompensa
+        np.matmul(novos_pesos[:, None, :], retornos_dia[:, :, None], out=self._r_p[:, None, None])
+
+        # Valor da carteira (juros compostos) e topo histórico
+        np.add(self._r_p, 1, out=self._fator)
+        self.valor_carteira *= self._fator
+        np.maximum(self.pico_historico, self.valor_carteira, out=self.pico_historico)
+        np.divide(self.valor_carteira, self.pico_historico, out=self._drawdown)
+        self._drawdown -= 1
+
+        # Recompensa: mesma fórmula de calcular_recompensa_portfolio
+        self.kernels.recompensa(
+            self.pesos,
+            novos_pesos,
+            retornos_dia,
+            self._drawdown,
+            lambda_dd=self.lambda_dd,
+            lambda_tc=self.lambda_tc,
+            out=self._reward,
+            r_p=self._r_p
+        )
+
+        # Atualiza estado
+        self.pesos[:] = novos_pesos
+        self.t += 1
+        dones = self.t >= self.t_fim
+
+        # quem terminou já volta para um novo episódio
+        self._resetar(np.flatnonzero(dones))
+
+        return self._get_state(), self._reward.copy(), dones
+
+    def step_acoes(self, actions, passo=None, max_weight=None):
+        """
+        Aplica as ações discretas (aplicar_acao_portfolio em lote) e avança um dia.
+
+        - actions: array [N] de inteiros em [0, NUM_ATIVOS * 2)
+        - passo, max_weight: None = os valores dados na criação do ambiente
+        """
+        passo = self.passo if passo is None else passo
+        max_weight = self.max_weight if max_weight is None else max_weight
+        self.kernels.aplicar_acao(self.pesos, actions, passo, max_weight, out=self._novos_pesos)
+        return self.step(self._novos_pesos)
+
+    def step_pesos(self, pesos_alvo, max_weight=None):
+        """
+        Modo de ação contínua: a política escolhe a alocação inteira de uma vez.
+
+        - pesos_alvo: array [N, NUM_ATIVOS]; passa pelas mesmas regras do
+          aplicar_acao_portfolio (long-only, normalizado, cap de max_weight)
+        - max_weight: None = o valor dado na criação do ambiente
+        """
+        max_weight = self.max_weight if max_weight is None else max_weight
+        self.kernels.projetar_pesos(pesos_alvo, max_weight, out=self._novos_pesos)
+        return self.step(self._novos_pesos)
+
+    #? Estado completo das carteiras (para checkpoint / retomar o treino)
+    def estado(self):
+        """
+        Cópia de tudo que muda durante os episódios: dia atual, fim do episódio,
+        valor, pico, pesos e o gerador dos dias de início.
+        """
+        return {
+            "t": self.t.copy(),
+            "t_fim": self.t_fim.copy(),
+            "valor_carteira": self.valor_carteira.copy(),
+            "pico_historico": self.pico_historico.copy(),
+            "pesos": self.pesos.copy(),
+            "rng": self.rng.bit_generator.state,
+        }
+
+    def restaurar(self, estado):
+        """
+        Volta ao estado salvo por estado() (no meio do episódio, se for o caso).
+
+        Retorna:
+            states [N, state_dim] do ponto restaurado
+        """
+        if len(estado["t"]) != self.num_envs:
+            raise ValueError(
+                f"Checkpoint tem {len(estado['t'])} carteiras, o ambiente tem {self.num_envs}."
+            )
+        self.t[:] = estado["t"]
+        self.t_fim[:] = estado["t_fim"]
+        self.valor_carteira[:] = estado["valor_carteira"]
+        self.pico_historico[:] = estado["pico_historico"]
+        self.pesos[:] = estado["pesos"]
+        self.rng.bit_generator.state = estado["rng"]
+        return self._get_state()
+
+    #? A "Visão" das N carteiras
+    def _get_state(self):
+        a = self.num_assets
+        t_obs = self.t - 1  # o robô só enxerga o passado (t-1)
+
+        self._obs[:, :a] = self.pesos
+        self._obs[:, a] = self.r_media[t_obs]
+        self._obs[:, a + 1] = self.v_media[t_obs]
+        self._obs[:, a + 2] = self.dd[t_obs]
+
+        np.nan_to_num(self._obs, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+        return self._obs